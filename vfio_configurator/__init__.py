@@ -0,0 +1,47 @@
+"""VFIO GPU passthrough configuration package.
+
+Public entry points are re-exported lazily (PEP 562) so that importing the
+package, or ``vfio_configurator.cli`` for ``--help``, doesn't import every
+submodule up front.
+"""
+
+import importlib
+
+__version__ = "0.1.0"
+
+# Public name -> submodule that defines it
+_LAZY_EXPORTS = {
+    "check_btrfs": "snapshot",
+    "create_btrfs_snapshot_recommendation": "snapshot",
+    "display_system_summary": "reporting",
+    "verify_after_reboot": "reporting",
+    "display_config_changes_summary": "reporting",
+    "setup_minimal_qemu_environment": "packages",
+    "is_arch_based": "packages",
+    "check_dependencies": "checks",
+    "check_root": "checks",
+    "get_gpus": "pci",
+    "get_iommu_groups": "pci",
+    "configure_kernel_parameters": "bootloader",
+    "configure_vfio_modprobe": "vfio_mods",
+    "update_initramfs": "initramfs",
+    "track_change": "state",
+    "ChangeTracker": "state",
+    "create_cleanup_script": "state",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    try:
+        submodule = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{submodule}", __name__), name)
+    globals()[name] = value  # Resolve only once
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -2,13 +2,14 @@
 
 import os
 import re
-import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 from .utils import (
     log_info, log_success, log_warning, log_error, log_debug,
-    cached_result, run_command
+    cached_result, run_command, has_command
 )
 from .bootloader import get_kernel_cmdline
 
@@ -23,17 +24,40 @@ def check_root() -> bool:
     return is_root
 
 
-def check_dependencies(debug: bool = False) -> bool:
-    """Check if all required commands are available."""
+def check_dependencies(debug: bool = False, required_commands: Optional[List[str]] = None) -> bool:
+    """Check if all required commands are available.
+
+    Args:
+        debug: If True, print additional debug information
+        required_commands: Commands needed by the selected mode. If None, check
+            everything the full setup needs, including bootloader and initramfs tools.
+
+    Returns:
+        True if all required commands were found
+    """
     log_info("Checking for required dependencies...")
 
-    required_commands = [
-        "lspci", "grep", "awk", "find", "mkdir", "cp", "chmod",
-        "cat", "ls", "df", "test", "uname", "sed", "cmp",  # Added sed, cmp for grub default editing and cleanup
-        "dmesg",  # Added for post-reboot check info
-        "id",  # Added for cleanup script root check
-        "bash",  # Added for cleanup script execution
-    ]
+    full_setup = required_commands is None
+    if full_setup:
+        required_commands = [
+            "lspci", "grep", "awk", "find", "mkdir", "cp", "chmod",
+            "cat", "ls", "df", "test", "uname", "sed", "cmp",  # Added sed, cmp for grub default editing and cleanup
+            "dmesg",  # Added for post-reboot check info
+            "id",  # Added for cleanup script root check
+            "bash",  # Added for cleanup script execution
+        ]
+
+    missing_commands = [cmd for cmd in required_commands if not has_command(cmd)]
+
+    if missing_commands:
+        log_error(f"Missing required commands: {', '.join(missing_commands)}")
+        log_error("Please install these dependencies before running the script.")
+        return False
+
+    if not full_setup:
+        # Bootloader and initramfs tools are only needed when configuring
+        log_success("All required dependencies are available.")
+        return True
 
     # Check for bootloader/initramfs update commands based on the actual bootloader
     from .bootloader import detect_bootloader
@@ -50,30 +74,20 @@ def check_dependencies(debug: bool = False) -> bool:
 
     # Add initramfs commands based on possible systems
     initramfs_cmds = []
-    if shutil.which('update-initramfs'):
+    if has_command('update-initramfs'):
         initramfs_cmds.append('update-initramfs')
-    if shutil.which('dracut'):
+    if has_command('dracut'):
         initramfs_cmds.append('dracut')
-    if shutil.which('mkinitcpio'):
+    if has_command('mkinitcpio'):
         initramfs_cmds.append('mkinitcpio')
 
-    missing_commands = []
-    for cmd in required_commands:
-        if not shutil.which(cmd):
-            missing_commands.append(cmd)
-
-    if missing_commands:
-        log_error(f"Missing required commands: {', '.join(missing_commands)}")
-        log_error("Please install these dependencies before running the script.")
-        return False
-
     # Check for necessary bootloader commands
     bootloader_cmds_needed = update_commands.get(bootloader, [])
-    if bootloader_cmds_needed and not any(shutil.which(cmd) for cmd in bootloader_cmds_needed):
+    if bootloader_cmds_needed and not any(has_command(cmd) for cmd in bootloader_cmds_needed):
         # If unknown, check against the 'unknown' list
         if bootloader == "unknown":
             unknown_cmds_to_check = update_commands["unknown"]
-            if not any(shutil.which(cmd) for cmd in unknown_cmds_to_check):
+            if not any(has_command(cmd) for cmd in unknown_cmds_to_check):
                 log_warning(f"Could not detect bootloader, and missing common update commands.")
                 log_warning(f"Looked for: {', '.join(unknown_cmds_to_check)}")
             # If at least one unknown command exists, maybe it's okay
@@ -98,6 +112,68 @@ def get_cpu_vendor_str() -> str:
     return vendor_id or "Unknown"
 
 
+def _probe_output(command: str) -> Optional[str]:
+    """Run a read-only shell probe without logging.
+
+    The probes below may run on worker threads (see prefetch_system_checks),
+    so they stay silent and the check functions log their results in order.
+
+    Returns:
+        The command's stripped stdout, or None if it failed or wasn't found
+    """
+    try:
+        result = subprocess.run(
+            command,
+            shell=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors='ignore'
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+@cached_result('cpu_virt_flag')
+def _get_cpu_virt_flag() -> Optional[str]:
+    """Gets the first svm/vmx flag from /proc/cpuinfo."""
+    return _probe_output("grep -m1 -E -o 'svm|vmx' /proc/cpuinfo")
+
+
+@cached_result('mokutil_sb_state')
+def _get_mokutil_sb_state() -> Optional[str]:
+    """Gets the output of 'mokutil --sb-state', or None if mokutil is missing or fails."""
+    if not has_command("mokutil"):
+        return None
+    return _probe_output("mokutil --sb-state")
+
+
+@cached_result('lsmod_output')
+def _get_lsmod_output() -> Optional[str]:
+    """Gets the output of lsmod."""
+    return _probe_output("lsmod")
+
+
+def prefetch_system_checks() -> None:
+    """Run the subprocess-backed probes behind the system checks concurrently.
+
+    The probes are independent and mostly wait on child processes, so
+    threads overlap their fork/exec latency. Results land in the shared
+    result cache, and the check functions then use them and log in their
+    usual order.
+    """
+    # The CPU vendor is already cached by the earlier is_amd_cpu() check
+    probes = (_get_cpu_virt_flag, _get_mokutil_sb_state, _get_lsmod_output)
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        futures = [executor.submit(probe) for probe in probes]
+        for future in futures:
+            future.result()
+
+
 @cached_result('is_amd_cpu')
 def is_amd_cpu() -> bool:
     """Check if the CPU is from AMD."""
@@ -119,8 +195,8 @@ def check_cpu_virtualization(debug: bool = False) -> bool:
     is_amd = vendor_id == "AuthenticAMD"
 
     # Check for AMD-V (svm) or Intel VT-x (vmx)
-    output = run_command("grep -m1 -E -o 'svm|vmx' /proc/cpuinfo", debug=debug)
-    log_debug(f"Raw virtualization check output from run_command: '{output}'", debug)
+    output = _get_cpu_virt_flag()
+    log_debug(f"Raw virtualization check output: '{output}'", debug)
 
     if output is not None:
         # Clean and get first instance of the flag
@@ -160,24 +236,23 @@ def check_secure_boot(debug: bool = False) -> Optional[bool]:
     """Check if Secure Boot is enabled."""
     log_info("Checking Secure Boot status...")
 
-    # Check if mokutil is installed
-    if shutil.which("mokutil"):
-        result = run_command("mokutil --sb-state", debug=debug)
-        if result:
-            result_lower = result.lower()
-            log_debug(f"mokutil --sb-state output: {result_lower}", debug)
-            if "secureboot enabled" in result_lower:
-                log_warning("Secure Boot is ENABLED via mokutil.")
-                log_warning("This might interfere with loading unsigned kernel modules (like vfio-pci).")
-                log_warning("Consider disabling Secure Boot or signing your VFIO modules if issues occur.")
-                return True
-            elif "secureboot disabled" in result_lower:
-                log_success("Secure Boot is disabled via mokutil.")
-                return False
-            else:
-                log_warning("Could not determine Secure Boot status from mokutil output.")
+    # Ask mokutil first (the probe returns None if it isn't installed)
+    result = _get_mokutil_sb_state()
+    if result:
+        result_lower = result.lower()
+        log_debug(f"mokutil --sb-state output: {result_lower}", debug)
+        if "secureboot enabled" in result_lower:
+            log_warning("Secure Boot is ENABLED via mokutil.")
+            log_warning("This might interfere with loading unsigned kernel modules (like vfio-pci).")
+            log_warning("Consider disabling Secure Boot or signing your VFIO modules if issues occur.")
+            return True
+        elif "secureboot disabled" in result_lower:
+            log_success("Secure Boot is disabled via mokutil.")
+            return False
         else:
-            log_debug("mokutil command failed or produced no output.", debug)
+            log_warning("Could not determine Secure Boot status from mokutil output.")
+    else:
+        log_debug("mokutil is not installed, failed or produced no output.", debug)
 
     # Alternative check via EFI variables (less reliable)
     secure_boot_var = Path("/sys/firmware/efi/efivars/SecureBoot-8be4df61-93ca-11d2-aa0d-00e098032b8c")
@@ -265,7 +340,7 @@ def check_vfio_modules(debug: bool = False) -> bool:
     log_info("Checking if VFIO modules are loaded...")
     required_modules = ["vfio", "vfio_iommu_type1", "vfio_pci", "vfio_virqfd"]
 
-    lsmod_output = run_command("lsmod", debug=debug)
+    lsmod_output = _get_lsmod_output()
     if lsmod_output is None:
         log_error("Failed to run lsmod to check loaded modules.")
         return False  # Cannot determine status
@@ -276,7 +351,7 @@ def check_vfio_modules(debug: bool = False) -> bool:
         if parts:
             loaded_modules.add(parts[0])
 
-    log_debug(f"Loaded modules (partial list from lsmod): {list(loaded_modules)[:10]}...", debug)
+    log_debug(lambda: f"Loaded modules (partial list from lsmod): {list(loaded_modules)[:10]}...", debug)
 
     missing_modules = [module for module in required_modules if module not in loaded_modules]
 
@@ -294,10 +369,10 @@ def check_libvirt_installed(debug: bool = False) -> bool:
     log_info("Checking for libvirt/QEMU installation...")
     
     # Check for core libvirt/QEMU binaries
-    libvirt_found = shutil.which('libvirtd') is not None
-    qemu_found = any(shutil.which(f'qemu-system-x86_64{suffix}') is not None 
+    libvirt_found = has_command('libvirtd')
+    qemu_found = any(has_command(f'qemu-system-x86_64{suffix}') 
                     for suffix in ['', '.bin', '.exe', '.static'])
-    virsh_found = shutil.which('virsh') is not None
+    virsh_found = has_command('virsh')
     
     if libvirt_found and qemu_found and virsh_found:
         log_success("Libvirt, QEMU and management tools are installed.")
@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 """Cleanup functionality for VFIO configuration."""
 
-import datetime
 import os
 import re
 import shutil
 import stat
 from pathlib import Path
+from shlex import quote as shq
 from typing import Dict, List, Any, Optional, Set, Tuple
 
 from .utils import log_info, log_success, log_warning, log_error, log_debug, run_command
 
+# Candidate grub.cfg locations probed by the generated script, in order
+_GRUB2_CFG_PATHS = ("/boot/grub2/grub.cfg", "/boot/grub/grub.cfg", "/boot/efi/EFI/fedora/grub.cfg")
+_GRUB_CFG_PATHS = ("/boot/grub/grub.cfg", "/boot/efi/EFI/ubuntu/grub.cfg")
+
 
 def create_cleanup_script(output_dir: str, changes: Dict[str, List[Dict[str, Any]]], dry_run: bool = False, debug: bool = False) -> Optional[str]:
     """Create a shell script to revert the changes recorded.
@@ -28,6 +32,12 @@ def create_cleanup_script(output_dir: str, changes: Dict[str, List[Dict[str, Any
     script_path = Path(output_dir) / "vfio_cleanup.sh"
     script_path_str = str(script_path)
 
+    if dry_run and not debug:
+        # Nothing would be shown or written, so skip building the script body
+        log_debug(f"[DRY RUN] Would create cleanup script at {script_path_str}", debug)
+        log_success("[DRY RUN] Cleanup script generation simulated.")
+        return script_path_str  # Return the intended path
+
     # Detect the most likely restoration commands based on distro
     distro_info = _detect_distro(debug)
     
@@ -81,14 +91,15 @@ def create_cleanup_script(output_dir: str, changes: Dict[str, List[Dict[str, Any
     script_content.extend(_generate_final_messages())
 
     # --- Write Script ---
-    final_script_content = "\n".join(script_content)
     if dry_run:
+        # Only reached with debug enabled, see the early return above
         log_debug(f"[DRY RUN] Would create cleanup script at {script_path_str}", debug)
-        if debug:
-            log_debug(f"Script content sample:\n{final_script_content[:500]}...\n(truncated)", debug)
+        sample = "\n".join(script_content)[:500]
+        log_debug(f"Script content sample:\n{sample}...\n(truncated)", debug)
         log_success("[DRY RUN] Cleanup script generation simulated.")
         return script_path_str  # Return the intended path
 
+    final_script_content = "\n".join(script_content)
     try:
         script_path.parent.mkdir(parents=True, exist_ok=True)  # Ensure output dir exists
         script_path.write_text(final_script_content)
@@ -169,6 +180,8 @@ def _detect_distro(debug: bool = False) -> Dict[str, Any]:
 
 def _generate_script_header(distro_info: Dict[str, Any]) -> List[str]:
     """Generate the script header with helper functions."""
+    # Only needed for the timestamp, so keep it off the module import path
+    import datetime
     return [
         "#!/bin/bash",
         "# VFIO Setup Cleanup Script",
@@ -213,8 +226,8 @@ def _generate_script_header(distro_info: Dict[str, Any]) -> List[str]:
         "    log_warn \"[DRY RUN] Would execute: $*\"",
         "    return 0 # Simulate success in dry run",
         "  fi",
-        "  # Use eval carefully, ensure commands are safe",
-        "  eval \"$@\"",
+        "  # Run the arguments as-is (no eval) so quoted paths are never re-expanded",
+        "  \"$@\"",
         "  local exit_code=$?",
         "  if [ $exit_code -ne 0 ]; then",
         "    log_error \"Command failed with exit code $exit_code: $*\"",
@@ -277,53 +290,53 @@ def _generate_file_restoration(file_changes: List[Dict[str, Any]]) -> List[str]:
     for change in reversed(file_changes):
         item = change.get('item')
         action = change.get('action')
-        details = change.get('details', {})
-        backup_path = details.get('backup_path') if isinstance(details, dict) else None
+        details = change.get('details') or {}
+        backup_path = details.get('backup_path')
 
         if not item or item in restored_files:
             continue
 
         if action == "created":
             script_content.extend([
-                f"log_info 'Removing created file: {item}'",
-                f"if [ -e \"{item}\" ]; then",
-                f"  run_cmd rm -f \"{item}\"",
+                f"log_info {shq(f'Removing created file: {item}')}",
+                f"if [ -e {shq(item)} ]; then",
+                f"  run_cmd rm -f {shq(item)}",
                 f"else",
-                f"  log_warn 'File {item} does not exist, nothing to remove.'",
+                f"  log_warn {shq(f'File {item} does not exist, nothing to remove.')}",
                 f"fi"
             ])
             
             # Check if we need to remove parent directory if it was created and is empty
-            if details and details.get('created_dir'):
+            if details.get('created_dir'):
                 parent_dir = os.path.dirname(item)
                 script_content.extend([
                     f"# Check if parent directory is empty and remove if created by the setup",
-                    f"remove_empty_dir_if_created \"{parent_dir}\" true"
+                    f"remove_empty_dir_if_created {shq(parent_dir)} true"
                 ])
                 
             restored_files.add(item)
             
         elif action == "modified" and backup_path:
             script_content.extend([
-                f"log_info 'Restoring backup for: {item}'",
-                f"if [ -e \"{backup_path}\" ]; then",
+                f"log_info {shq(f'Restoring backup for: {item}')}",
+                f"if [ -e {shq(backup_path)} ]; then",
                 f"  # Create a new backup of the current version just in case",
-                f"  current_backup=$(backup_file \"{item}\")",
+                f"  current_backup=$(backup_file {shq(item)})",
                 f"  if [ -n \"$current_backup\" ]; then",
                 f"    log_info \"Created backup of current file: $current_backup\"",
                 f"  fi",
-                f"  run_cmd cp -f \"{backup_path}\" \"{item}\"",
-                f"  log_success 'Restored {item} from backup {backup_path}'",
+                f"  run_cmd cp -f {shq(backup_path)} {shq(item)}",
+                f"  log_success {shq(f'Restored {item} from backup {backup_path}')}",
                 f"else",
-                f"  log_warn 'Backup file {backup_path} not found. Cannot restore {item}.'",
+                f"  log_warn {shq(f'Backup file {backup_path} not found. Cannot restore {item}.')}",
                 f"fi"
             ])
             restored_files.add(item)
             
         elif action == "modified":
             script_content.extend([
-                f"log_warn 'No backup available for modified file: {item}'",
-                f"log_warn 'Manual restoration may be required for: {item}'"
+                f"log_warn {shq(f'No backup available for modified file: {item}')}",
+                f"log_warn {shq(f'Manual restoration may be required for: {item}')}"
             ])
             restored_files.add(item)
             
@@ -365,8 +378,10 @@ def _generate_kernel_param_restoration(
         script_content.append("# --- Removing Kernel Parameters (kernelstub - Pop!_OS) ---")
         script_content.append("if command -v kernelstub >/dev/null 2>&1; then")
         script_content.append("  log_info 'Attempting to remove kernel parameters via kernelstub...'")
-        for param in sorted(list(kernelstub_params)):
-            script_content.append(f"  run_cmd kernelstub --delete-options \"{param}\" || log_warn 'Failed to remove parameter: {param}'")
+        script_content.append("\n".join(
+            f"  run_cmd kernelstub --delete-options \"{param}\" || log_warn 'Failed to remove parameter: {param}'"
+            for param in sorted(kernelstub_params)
+        ))
         script_content.append("  log_info 'Running kernelstub to apply changes...'")
         script_content.append("  run_cmd kernelstub")
         script_content.append("else")
@@ -534,35 +549,9 @@ def _generate_bootloader_update(grub_modified: bool, distro_info: Dict[str, Any]
             "  log_info 'Using update-grub'",
             "  run_cmd update-grub",
             "elif command -v grub2-mkconfig >/dev/null 2>&1; then",
-            "  # Find a valid grub.cfg location",
-            "  grub_cfg_found=false",
-            "  for cfg_path in /boot/grub2/grub.cfg /boot/grub/grub.cfg /boot/efi/EFI/fedora/grub.cfg; do",
-            "    if [ -e \"$cfg_path\" ]; then",
-            "      log_info \"Found GRUB config at $cfg_path\"",
-            "      run_cmd grub2-mkconfig -o \"$cfg_path\"",
-            "      grub_cfg_found=true",
-            "      break",
-            "    fi",
-            "  done",
-            "  if [ \"$grub_cfg_found\" = false ]; then",
-            "    log_warn 'Could not find a valid grub.cfg location.'",
-            "    log_warn 'You may need to manually update your GRUB configuration.'",
-            "  fi",
+            _grub_cfg_probe("grub2-mkconfig", _GRUB2_CFG_PATHS),
             "elif command -v grub-mkconfig >/dev/null 2>&1; then",
-            "  # Find a valid grub.cfg location",
-            "  grub_cfg_found=false",
-            "  for cfg_path in /boot/grub/grub.cfg /boot/efi/EFI/ubuntu/grub.cfg; do",
-            "    if [ -e \"$cfg_path\" ]; then",
-            "      log_info \"Found GRUB config at $cfg_path\"",
-            "      run_cmd grub-mkconfig -o \"$cfg_path\"",
-            "      grub_cfg_found=true",
-            "      break",
-            "    fi",
-            "  done",
-            "  if [ \"$grub_cfg_found\" = false ]; then",
-            "    log_warn 'Could not find a valid grub.cfg location.'",
-            "    log_warn 'You may need to manually update your GRUB configuration.'",
-            "  fi",
+            _grub_cfg_probe("grub-mkconfig", _GRUB_CFG_PATHS),
             "else",
             "  log_warn 'Could not determine appropriate GRUB update command.'",
             "  log_warn 'You may need to manually update your bootloader configuration.'",
@@ -635,6 +624,26 @@ def _generate_bootloader_update(grub_modified: bool, distro_info: Dict[str, Any]
     return script_content
 
 
+def _grub_cfg_probe(mkconfig_cmd: str, cfg_paths: Tuple[str, ...]) -> str:
+    """Generate the script block that regenerates the first grub.cfg found."""
+    return "\n".join((
+        "  # Find a valid grub.cfg location",
+        "  grub_cfg_found=false",
+        f"  for cfg_path in {' '.join(cfg_paths)}; do",
+        "    if [ -e \"$cfg_path\" ]; then",
+        "      log_info \"Found GRUB config at $cfg_path\"",
+        f"      run_cmd {mkconfig_cmd} -o \"$cfg_path\"",
+        "      grub_cfg_found=true",
+        "      break",
+        "    fi",
+        "  done",
+        "  if [ \"$grub_cfg_found\" = false ]; then",
+        "    log_warn 'Could not find a valid grub.cfg location.'",
+        "    log_warn 'You may need to manually update your GRUB configuration.'",
+        "  fi",
+    ))
+
+
 def _generate_btrfs_info(btrfs_changes: List[Dict[str, Any]]) -> List[str]:
     """Generate script content for BTRFS snapshots information."""
     script_content = []
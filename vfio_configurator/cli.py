@@ -4,57 +4,67 @@
 
 import os
 import sys
-import argparse
 import shutil
 import shlex
-import json
-import datetime
-from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any, Union
-
-from vfio_configurator.snapshot import create_btrfs_snapshot_recommendation, check_btrfs
-from vfio_configurator.reporting import display_system_summary, verify_after_reboot, display_config_changes_summary
-from vfio_configurator.packages import setup_minimal_qemu_environment, is_arch_based
+import subprocess
+import functools
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Any, Union
 
+from . import __version__
 from .utils import (
-    Colors, log_info, log_success, log_warning, log_error, log_debug,
-    run_command
-)
-from .checks import (
-    check_dependencies, check_root, is_amd_cpu, check_cpu_virtualization,
-    check_secure_boot, check_iommu, check_kernel_cmdline_conflicts,
-    check_vfio_modules, check_libvirt_installed
-)
-from .pci import (
-    get_gpus, find_gpu_for_passthrough, check_host_gpu_driver,
-    get_iommu_groups, find_gpu_related_devices, get_device_ids
+    Colors, log_info, log_success, log_warning, log_error, log_debug
 )
-from .bootloader import (
-    detect_bootloader, configure_kernel_parameters
-)
-from .vfio_mods import configure_vfio_modprobe
-from .initramfs import update_initramfs
-from .state import track_change, create_cleanup_script
+
+if TYPE_CHECKING:
+    import argparse
+
+# Commands needed by the modes that don't configure anything
+_CLEANUP_COMMANDS = ["sudo", "bash"]
+# xrandr is optional: verify checks for it with `which` before running it
+_VERIFY_COMMANDS = ["lspci", "dmesg", "grep", "cat", "ls", "wc", "sort", "which"]
+
+# Fixed banner and section header strings
+_SEP = f"{Colors.BOLD}{'=' * 80}{Colors.ENDC}"
+_HDR_BTRFS = f"\n{Colors.BOLD}BTRFS Snapshot{Colors.ENDC}"
+_HDR_KERNEL = f"\n{Colors.BOLD}Kernel Parameter Configuration{Colors.ENDC}"
+_HDR_VFIO = f"\n{Colors.BOLD}VFIO Driver Configuration (modprobe){Colors.ENDC}"
+_HDR_INITRAMFS = f"\n{Colors.BOLD}Initramfs Update{Colors.ENDC}"
+_HDR_PACKAGES = f"\n{Colors.BOLD}Virtualization Software Installation{Colors.ENDC}"
+
+# Submodules are imported where they are used so that --help, --cleanup and
+# --verify don't pay for the whole setup import graph.
 
 
 def gather_system_info(debug: bool = False) -> Dict[str, Any]:
     """Gather all relevant system information for VFIO setup."""
+    from .checks import (
+        prefetch_system_checks, is_amd_cpu, check_cpu_virtualization, check_secure_boot, check_iommu,
+        check_kernel_cmdline_conflicts, check_vfio_modules, check_libvirt_installed
+    )
+    from .pci import (
+        get_gpus, find_gpu_for_passthrough, check_host_gpu_driver,
+        get_iommu_groups, find_gpu_related_devices, get_device_ids
+    )
+    from . import snapshot as _snap
+
     log_info("Gathering system information...")
 
     system_info: Dict[str, Any] = {
         "root_privileges": os.geteuid() == 0,
         "cpu_vendor_is_amd": is_amd_cpu(),
-        "cpu_virtualization": check_cpu_virtualization(debug=debug),
-        "secure_boot_enabled": check_secure_boot(debug=debug),  # Store status: True, False, or None
-        "kernel_cmdline_conflicts": check_kernel_cmdline_conflicts(debug=debug),
-        "btrfs_system": check_btrfs(debug=debug) if 'check_btrfs' in globals() else False,
-        "libvirt_installed": check_libvirt_installed(debug=debug),  # Checks common tools & service
+        # Host checks - populated once a passthrough GPU has been found
+        "cpu_virtualization": None,
+        "secure_boot_enabled": None,  # Store status: True, False, or None
+        "kernel_cmdline_conflicts": None,
+        "btrfs_system": False,
+        "libvirt_installed": None,
         # IOMMU checks
         "iommu_enabled": False,  # Will be set by check_iommu
         "iommu_passthrough_mode": False,  # Will be set by check_iommu
         "iommu_groups": None,  # Will be populated later if IOMMU active
         # VFIO module check
-        "vfio_modules_loaded": check_vfio_modules(debug=debug),  # Check current state
+        "vfio_modules_loaded": None,
         # GPU info - populated below
         "gpus": [],
         "gpu_for_passthrough": None,
@@ -80,6 +90,19 @@ def gather_system_info(debug: bool = False) -> Dict[str, Any]:
          log_error("No GPU selected or available for passthrough.")
          return system_info  # Cannot proceed without a target GPU
 
+    # The remaining checks only matter once there is a GPU to pass through.
+    # Run their probe commands in parallel; the checks then read the cached
+    # results in order.
+    prefetch_system_checks()
+    system_info.update({
+        "cpu_virtualization": check_cpu_virtualization(debug=debug),
+        "secure_boot_enabled": check_secure_boot(debug=debug),
+        "kernel_cmdline_conflicts": check_kernel_cmdline_conflicts(debug=debug),
+        "btrfs_system": _snap.check_btrfs(debug=debug),
+        "libvirt_installed": check_libvirt_installed(debug=debug),  # Checks common tools & service
+        "vfio_modules_loaded": check_vfio_modules(debug=debug),  # Check current state
+    })
+
     # Check host GPU driver status using potentially updated driver info
     system_info["host_gpu_driver_ok"] = check_host_gpu_driver(
         system_info["gpus"],
@@ -90,7 +113,7 @@ def gather_system_info(debug: bool = False) -> Dict[str, Any]:
     # --- IOMMU Group and Device ID Logic ---
     # Only try to get groups and IDs if IOMMU seems enabled from cmdline check
     if system_info["iommu_enabled"]:
-        # Get IOMMU groups (will trigger PCI fetch again if not cached, harmless)
+        # Get IOMMU groups (reuses the PCI scan cached by get_gpus above)
         iommu_groups = get_iommu_groups(debug=debug)
         system_info["iommu_groups"] = iommu_groups  # Store raw groups
 
@@ -118,24 +141,45 @@ def gather_system_info(debug: bool = False) -> Dict[str, Any]:
     return system_info
 
 
+def _ask_yes_no(prompt: str) -> bool:
+    """Ask the user a yes/no question on the terminal."""
+    return input(f"{prompt} (y/n): ").lower() == 'y'
+
+
+def _assume_yes(prompt: str) -> bool:
+    """Answer 'yes' to a prompt without asking (non-interactive/dry run)."""
+    return True
+
+
 def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interactive: bool = False, dry_run: bool = False, debug: bool = False) -> Tuple[bool, Dict[str, List[Dict[str, Any]]], bool]:
     """Run the setup process interactively based on gathered system info."""
-    changes: Dict[str, List[Dict[str, Any]]] = {}
+    from . import snapshot as _snap
+    from .packages import setup_minimal_qemu_environment, is_arch_based
+    from .bootloader import configure_kernel_parameters
+    from .vfio_mods import configure_vfio_modprobe
+    from .initramfs import update_initramfs
+    from .state import ChangeTracker
+
+    # Prompts are answered 'yes' up front in non-interactive and dry run modes
+    confirm = _assume_yes if non_interactive or dry_run else _ask_yes_no
+
+    tracker = ChangeTracker()
     setup_successful = True
     made_critical_changes = False  # Track if changes requiring reboot were made
 
     # --- Prerequisite Checks ---
     if not system_info["root_privileges"]:
         log_error("Root privileges required. Aborting.")
-        return False, changes, made_critical_changes
-        
-    if not system_info["cpu_virtualization"]:
-        log_error("CPU virtualization (SVM/VT-x) is not enabled. Please enable it in BIOS/UEFI. Aborting.")
-        return False, changes, made_critical_changes
+        return False, tracker.to_dict(), made_critical_changes
         
+    # Checked before CPU virtualization, which isn't probed without a GPU
     if not system_info.get("gpu_for_passthrough"):
         log_error("No GPU selected for passthrough. Aborting.")
-        return False, changes, made_critical_changes
+        return False, tracker.to_dict(), made_critical_changes
+
+    if not system_info["cpu_virtualization"]:
+        log_error("CPU virtualization (SVM/VT-x) is not enabled. Please enable it in BIOS/UEFI. Aborting.")
+        return False, tracker.to_dict(), made_critical_changes
         
     if not system_info.get("host_gpu_driver_ok"):
          log_error("Host GPU driver check failed or no suitable host GPU found.")
@@ -143,28 +187,24 @@ def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interact
              response = input("Continue anyway? (y/n): ").lower()
              if response != 'y':
                  log_info("Setup aborted by user.")
-                 return False, changes, made_critical_changes
+                 return False, tracker.to_dict(), made_critical_changes
          else:
              log_warning("Continuing despite host GPU driver issues (non-interactive mode).")
 
     # --- BTRFS Snapshot ---
-    if system_info.get("btrfs_system", False) and 'check_btrfs' in globals() and 'create_btrfs_snapshot_recommendation' in globals():
-        print(f"\n{Colors.BOLD}BTRFS Snapshot{Colors.ENDC}")
-        snapshot_path = create_btrfs_snapshot_recommendation(dry_run, debug)
+    if system_info.get("btrfs_system", False):
+        print(_HDR_BTRFS)
+        snapshot_path = _snap.create_btrfs_snapshot_recommendation(dry_run, debug)
         if snapshot_path:
-             changes = track_change(changes, "btrfs", snapshot_path, "snapshot")
+             tracker.add("btrfs", snapshot_path, "snapshot")
              log_success(f"BTRFS snapshot created or identified at {snapshot_path}")
 
     # --- Kernel Parameter Configuration ---
     needs_kernel_param_config = not system_info["iommu_enabled"] or not system_info["iommu_passthrough_mode"]
     kernel_param_result = None
     if needs_kernel_param_config:
-        print(f"\n{Colors.BOLD}Kernel Parameter Configuration{Colors.ENDC}")
-        response = 'y'  # Default to yes for non-interactive or dry run
-        if not non_interactive and not dry_run:
-             response = input("Configure kernel parameters for IOMMU and VFIO? (y/n): ").lower()
-
-        if response == 'y':
+        print(_HDR_KERNEL)
+        if confirm("Configure kernel parameters for IOMMU and VFIO?"):
             kernel_param_result = configure_kernel_parameters(dry_run, debug, output_dir)
             if kernel_param_result and kernel_param_result.get("status"):
                 log_success("Kernel parameter configuration completed successfully.")
@@ -173,23 +213,23 @@ def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interact
                 # Track changes for grub/kernelstub/systemd-boot
                 method = kernel_param_result.get("method")
                 if method == "grub" and kernel_param_result.get("backup_path"):
-                    changes = track_change(
-                        changes, "files", "/etc/default/grub", "modified",
+                    tracker.add(
+                        "files", "/etc/default/grub", "modified",
                         {"backup_path": kernel_param_result.get("backup_path")}
                     )
                 elif method == "kernelstub":
                     for param in kernel_param_result.get("added_params", []):
-                        changes = track_change(changes, "kernelstub", param, "added")
+                        tracker.add("kernelstub", param, "added")
                 elif method == "systemd-boot" and kernel_param_result.get("backup_paths"):
                     # Track all modified systemd-boot entries with specific category
                     for file_path, backup_path in kernel_param_result.get("backup_paths", {}).items():
-                        changes = track_change(
-                            changes, "systemd-boot", file_path, "modified",
+                        tracker.add(
+                            "systemd-boot", file_path, "modified",
                             {"backup_path": backup_path, "params": kernel_param_result.get("added_params", [])}
                         )
                     # Also add a record of the bootloader type for the cleanup script
-                    changes = track_change(
-                        changes, "bootloader", "type", "info",
+                    tracker.add(
+                        "bootloader", "type", "info",
                         {"value": "systemd-boot"}
                     )
             else:
@@ -204,18 +244,14 @@ def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interact
     passthrough_ids = system_info.get("passthrough_device_ids", [])
     # We configure modprobe if we successfully identified IDs AND IOMMU is enabled
     if passthrough_ids and system_info["iommu_enabled"]:
-        print(f"\n{Colors.BOLD}VFIO Driver Configuration (modprobe){Colors.ENDC}")
-        response = 'y'
-        if not non_interactive and not dry_run:
-            response = input("Configure VFIO driver options for device passthrough? (y/n): ").lower()
-
-        if response == 'y':
+        print(_HDR_VFIO)
+        if confirm("Configure VFIO driver options for device passthrough?"):
              modprobe_success = configure_vfio_modprobe(passthrough_ids, dry_run, debug)
              if modprobe_success:
                  log_success("VFIO driver configuration completed successfully.")
                  made_critical_changes = True
-                 changes = track_change(changes, "files", "/etc/modprobe.d/vfio.conf", "modified")
-                 changes = track_change(changes, "files", "/etc/modules-load.d/vfio-pci-load.conf", "modified")
+                 tracker.add("files", "/etc/modprobe.d/vfio.conf", "modified")
+                 tracker.add("files", "/etc/modules-load.d/vfio-pci-load.conf", "modified")
              else:
                  log_error("VFIO driver configuration failed.")
                  setup_successful = False
@@ -236,16 +272,12 @@ def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interact
     # --- Initramfs Update ---
     # Update if critical changes (kernel params or modprobe) were made
     if made_critical_changes:
-        print(f"\n{Colors.BOLD}Initramfs Update{Colors.ENDC}")
-        response = 'y'
-        if not non_interactive and not dry_run:
-             response = input("Update initramfs to include changes? (y/n): ").lower()
-
-        if response == 'y':
+        print(_HDR_INITRAMFS)
+        if confirm("Update initramfs to include changes?"):
             initramfs_success = update_initramfs(dry_run, debug)
             if initramfs_success:
                 log_success("Initramfs update completed successfully.")
-                changes = track_change(changes, "initramfs", "update", "executed")
+                tracker.add("initramfs", "update", "executed")
             else:
                 log_error("Initramfs update failed.")
                 log_warning("System may not boot properly with VFIO without a successful initramfs update.")
@@ -256,17 +288,13 @@ def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interact
 
     # --- Install Virtualization Software ---
     if not system_info["libvirt_installed"]:
-        print(f"\n{Colors.BOLD}Virtualization Software Installation{Colors.ENDC}")
+        print(_HDR_PACKAGES)
         log_info("Virtualization software (QEMU, Libvirt, etc.) seems missing or incomplete.")
         
         # Check if system is Arch-based
         arch_system = is_arch_based()
         if arch_system:
-            response = 'y'
-            if not non_interactive and not dry_run:
-                response = input("Would you like to install minimal QEMU environment for Arch Linux now? (y/n): ").lower()
-
-            if response == 'y':
+            if confirm("Would you like to install minimal QEMU environment for Arch Linux now?"):
                 log_info("Installing minimal QEMU environment for VFIO passthrough (Arch Linux)...")
                 
                 # Run the setup function from the packages module
@@ -277,8 +305,8 @@ def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interact
                     if setup_result["installed_packages"]:
                         log_info(f"Installed packages: {', '.join(setup_result['installed_packages'])}")
                     
-                    changes = track_change(changes, "packages", "qemu-minimal", "installed",
-                                           {"installed_packages": setup_result["installed_packages"]})
+                    tracker.add("packages", "qemu-minimal", "installed",
+                                {"installed_packages": setup_result["installed_packages"]})
                 else:
                     log_error("Failed to install minimal QEMU environment.")
                     if setup_result["failed_packages"]:
@@ -289,11 +317,7 @@ def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interact
                 log_warning("You will need to install virtualization software manually to use the passthrough GPU.")
         else:
             # For non-Arch systems, provide manual instructions
-            response = 'y'
-            if not non_interactive and not dry_run:
-                response = input("Would you like to install virtualization software now? (y/n): ").lower()
-
-            if response == 'y':
+            if confirm("Would you like to install virtualization software now?"):
                 log_info("Please install virtualization software manually using your package manager.")
                 log_info("Refer to the distribution-specific suggestions shown earlier.")
                 log_info("For Debian/Ubuntu: sudo apt install qemu-kvm libvirt-daemon-system virt-manager")
@@ -304,11 +328,64 @@ def interactive_setup(output_dir: str, system_info: Dict[str, Any], non_interact
                 log_warning("You will need to install this software manually to use the passthrough GPU.")
 
     # --- Final Outcome ---
-    return setup_successful, changes, made_critical_changes
+    return setup_successful, tracker.to_dict(), made_critical_changes
 
 
-def parse_args():
-    """Parse command line arguments."""
+def _dump_changes_json(changes: Dict[str, List[Dict[str, Any]]]) -> bytes:
+    """Serialize the changes log as indented JSON.
+
+    Uses orjson when it is installed and falls back to the standard library.
+    """
+    try:
+        import orjson
+    except ImportError:
+        import json
+        return json.dumps(changes, indent=2, default=str).encode()
+    return orjson.dumps(changes, option=orjson.OPT_INDENT_2, default=str)
+
+
+# Boolean flags understood by the argv fast path -> attribute name
+_BOOL_FLAGS = {
+    '--dry-run': 'dry_run',
+    '--debug': 'debug',
+    '--cleanup': 'cleanup',
+    '--non-interactive': 'non_interactive',
+    '--verify': 'verify',
+    '--verify-auto': 'verify_auto',
+}
+
+
+def _fast_parse_args(argv: List[str]) -> Optional[SimpleNamespace]:
+    """Parse the common exact-spelling flags without argparse.
+
+    Returns None for anything else (help, --version, abbreviations, unknown
+    or malformed arguments) so the caller can fall back to argparse.
+    """
+    values: Dict[str, Any] = dict.fromkeys(_BOOL_FLAGS.values(), False)
+    values['output_dir'] = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in _BOOL_FLAGS:
+            values[_BOOL_FLAGS[arg]] = True
+        elif arg == '--output-dir':
+            i += 1
+            if i == len(argv) or argv[i].startswith('-'):
+                return None
+            values['output_dir'] = argv[i]
+        elif arg.startswith('--output-dir='):
+            values['output_dir'] = arg.partition('=')[2]
+        else:
+            return None
+        i += 1
+    return SimpleNamespace(**values)
+
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> "argparse.ArgumentParser":
+    """Build the command line parser (once per process)."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='VFIO GPU Passthrough Setup Script for AMD GPUs.',
         epilog="Example: sudo python3 -m vfio_configurator --debug",
@@ -328,8 +405,18 @@ def parse_args():
                         help='Show verification steps to perform after reboot.')
     parser.add_argument('--verify-auto', action='store_true',
                         help='Run automated verification checks with interactive fixing of failed steps.')
-    
-    args = parser.parse_args()
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    return parser
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    """Parse command line arguments."""
+    if argv is None:
+        argv = sys.argv[1:]
+    # argparse is only needed for help/version output and error reporting
+    args = _fast_parse_args(argv)
+    if args is None:
+        args = _build_parser().parse_args(argv)
     
     # Set debug if dry-run is set
     if args.dry_run:
@@ -338,6 +425,24 @@ def parse_args():
     return args
 
 
+def _print_banner(args) -> None:
+    """Print the run banner and notices for the active modes."""
+    print(_SEP)
+    mode_str = ""
+    if args.cleanup: mode_str += "[CLEANUP MODE] "
+    if args.verify or args.verify_auto: mode_str += "[VERIFY MODE] "
+    if args.dry_run: mode_str += "[DRY RUN MODE] "
+    print(f"{Colors.BOLD}{f'VFIO GPU Passthrough Setup {mode_str}'.strip():^80}{Colors.ENDC}")
+    print(_SEP)
+
+    if args.debug:
+        log_debug("Debug mode enabled", True)
+    if args.dry_run:
+        log_warning("Dry run mode active: No changes will be made to the system.")
+    if args.non_interactive:
+        log_warning("Non-interactive mode active: Assuming 'yes' to configuration prompts.")
+
+
 def main():
     """Main entry point for the application."""
     args = parse_args()
@@ -349,46 +454,43 @@ def main():
         output_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
     # Validate output directory existence
-    output_dir_path = Path(output_dir)
-    if not output_dir_path.exists():
+    if not os.path.exists(output_dir):
         log_info(f"Output directory '{output_dir}' does not exist. Attempting to create.")
         try:
-            output_dir_path.mkdir(parents=True, exist_ok=True)
+            os.makedirs(output_dir, exist_ok=True)
         except Exception as e:
             log_error(f"Failed to create output directory: {e}")
             return 1
-    elif not output_dir_path.is_dir():
+    elif not os.path.isdir(output_dir):
         log_error(f"Output path '{output_dir}' exists but is not a directory.")
         return 1
 
     log_info(f"Using output directory: {output_dir}")
 
-    print(f"{Colors.BOLD}{'=' * 80}{Colors.ENDC}")
-    mode_str = ""
-    if args.cleanup: mode_str += "[CLEANUP MODE] "
-    if args.verify or args.verify_auto: mode_str += "[VERIFY MODE] "
-    if args.dry_run: mode_str += "[DRY RUN MODE] "
-    print(f"{Colors.BOLD}{f'VFIO GPU Passthrough Setup {mode_str}'.strip():^80}{Colors.ENDC}")
-    print(f"{Colors.BOLD}{'=' * 80}{Colors.ENDC}")
-
-    if args.debug:
-        log_debug("Debug mode enabled", True)
-    if args.dry_run:
-        log_warning("Dry run mode active: No changes will be made to the system.")
-    if args.non_interactive:
-        log_warning("Non-interactive mode active: Assuming 'yes' to configuration prompts.")
+    from .checks import check_dependencies, check_root, is_amd_cpu
 
     # --- Dependency Check ---
-    if not check_dependencies(debug=args.debug):
+    # Verify and cleanup modes only need a handful of tools. --verify-auto may
+    # go on to reconfigure the bootloader and initramfs, so it gets the full check.
+    if args.verify and not args.verify_auto:
+        required_commands = _VERIFY_COMMANDS
+    elif args.cleanup:
+        required_commands = _CLEANUP_COMMANDS
+    else:
+        required_commands = None  # Full setup check
+    if not check_dependencies(debug=args.debug, required_commands=required_commands):
         log_error("Missing required system commands. Please install them and retry.")
         return 1
 
+    _print_banner(args)
+
     # --- Root Check ---
     if not check_root():
         return 1
         
     # --- Verification Mode ---
     if args.verify or args.verify_auto:
+        from .reporting import verify_after_reboot
         if args.verify_auto:
             log_info("Running automated verification checks...")
             verify_after_reboot(args.debug, interactive=True)
@@ -398,24 +500,31 @@ def main():
         
     # --- Cleanup Mode ---
     if args.cleanup:
-        cleanup_script_path = Path(output_dir) / "vfio_cleanup.sh"
-        if not cleanup_script_path.exists():
+        cleanup_script_path = os.path.join(output_dir, "vfio_cleanup.sh")
+        if not os.path.exists(cleanup_script_path):
             log_error(f"Cleanup script not found at: {cleanup_script_path}")
             log_error("Please run the setup script first to generate a cleanup script.")
             return 1
 
-        cleanup_cmd = f"sudo bash {shlex.quote(str(cleanup_script_path))}"
+        # Run it directly rather than through run_command, which goes via
+        # /bin/sh and would capture the script's output
+        cleanup_argv = ["sudo", "bash", cleanup_script_path]
+        cleanup_cmd = shlex.join(cleanup_argv)
         if args.dry_run:
             log_warning(f"[DRY RUN] Would run cleanup script: {cleanup_cmd}")
             return 0
         else:
             log_info(f"Running cleanup script: {cleanup_cmd}")
-            result = run_command(cleanup_cmd, dry_run=False, debug=args.debug)
-            if result is not None:
+            try:
+                result = subprocess.run(cleanup_argv, check=False)
+            except OSError as e:
+                log_error(f"Failed to run cleanup script: {e}")
+                return 1
+            if result.returncode == 0:
                 log_success("Cleanup script completed.")
                 return 0
             else:
-                log_error("Cleanup script failed or was interrupted.")
+                log_error(f"Cleanup script failed or was interrupted (exit code {result.returncode}).")
                 return 1
 
     # --- Standard Setup Mode ---
@@ -442,6 +551,7 @@ def main():
         return 1
 
     # --- Display Summary ---
+    from .reporting import display_system_summary
     display_system_summary(system_info)
 
     # --- User Confirmation ---
@@ -464,10 +574,11 @@ def main():
     # --- Save Changes Log & Generate Cleanup Script ---
     cleanup_script_path_str = None
     if changes:
-        changes_file_path = Path(output_dir) / "vfio_changes.json"
+        from .state import create_cleanup_script
+        changes_file_path = os.path.join(output_dir, "vfio_changes.json")
         try:
-            with open(changes_file_path, 'w') as f:
-                json.dump(changes, f, indent=2, default=str)
+            with open(changes_file_path, 'wb') as f:
+                f.write(_dump_changes_json(changes))
             log_success(f"Changes log saved to {changes_file_path}")
             
             # Generate cleanup script
@@ -476,7 +587,7 @@ def main():
             log_error(f"Failed to save changes log or generate cleanup script: {e}")
 
     # --- Final Messages ---
-    print(f"\n{Colors.BOLD}{'=' * 80}{Colors.ENDC}")
+    print(f"\n{_SEP}")
     if setup_successful:
         if args.dry_run:
             log_success("[DRY RUN] VFIO setup simulation completed. No actual changes were made.")
@@ -492,7 +603,7 @@ def main():
     else:
         log_error("VFIO setup process failed or was aborted.")
         log_info("Review the errors above. Some changes might have been partially applied.")
-        if cleanup_script_path_str and Path(cleanup_script_path_str).exists():
+        if cleanup_script_path_str and os.path.exists(cleanup_script_path_str):
             log_info(f"You can run the cleanup script to revert changes: sudo bash {cleanup_script_path_str}")
             log_info("Or run this script with --cleanup to execute the cleanup script.")
         elif changes:
@@ -1,14 +1,26 @@
 """Handles updating the initial RAM disk image to include VFIO modules."""
 
 import os
+import platform
 import re
-import shutil
+import shlex
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Set, Tuple
+from typing import List, Optional, Dict, Any, Iterable, Set, Tuple
 
 from .utils import (
     log_info, log_success, log_warning, log_error, log_debug,
-    run_command, get_distro_info, backup_file, create_timestamped_backup
+    run_command, get_distro_info, backup_file, create_timestamped_backup,
+    cached_result, has_command
+)
+
+# Modules every initramfs needs for early vfio-pci binding (vfio_virqfd is added for old kernels)
+_BASE_VFIO_MODULES: Tuple[str, ...] = ('vfio', 'vfio_iommu_type1', 'vfio_pci')
+# mkinitcpio.conf array lines
+_MODULES_RE = re.compile(r'^MODULES\s*=\s*\((.*?)\)', re.MULTILINE)
+_HOOKS_RE = re.compile(r'^HOOKS\s*=\s*\((.*?)\)', re.MULTILINE)
+# Kernel release string as printed by `uname -r`, e.g. "6.1.0-rc3-1-custom"
+_KRELEASE_RE = re.compile(
+    r'(?P<major>\d+)\.(?P<minor>\d+)(?:\.(?P<patch>\d+))?(?:-rc(?P<rc>\d+))?(?:-(?P<extra>\S+))?'
 )
 
 
@@ -29,7 +41,7 @@ def update_initramfs(dry_run: bool = False, debug: bool = False) -> bool:
     log_info("Updating initramfs to include VFIO modules...")
     
     # First detect which initramfs systems are present
-    systems = detect_initramfs_systems(debug)
+    systems = detect_initramfs_systems(debug=debug)
     
     if not systems:
         log_warning("No supported initramfs systems detected.")
@@ -37,108 +49,133 @@ def update_initramfs(dry_run: bool = False, debug: bool = False) -> bool:
     
     log_info(f"Detected initramfs systems: {', '.join(systems)}")
     
-    vfio_modules = ['vfio', 'vfio_iommu_type1', 'vfio_pci']
-    
-    # Check kernel version - add vfio_virqfd only for older kernels
-    kernel_version = get_kernel_version()
-    if kernel_version and (kernel_version[0] < 6 or (kernel_version[0] == 6 and kernel_version[1] < 2)):
-        vfio_modules.append('vfio_virqfd')
-        log_debug(f"Including vfio_virqfd for kernel {kernel_version}", debug)
-    else:
-        log_debug(f"Skipping vfio_virqfd as kernel {kernel_version} has this integrated into vfio module", debug)
+    vfio_modules = get_vfio_initramfs_modules(debug=debug)
     
     # Check if we're on an Arch-based system
     distro_info = get_distro_info()
     distro_name = distro_info.get('id', '').lower() if distro_info else ''
-    is_arch_based = distro_name in ['arch', 'manjaro', 'endeavouros', 'garuda'] or os.path.exists("/etc/arch-release")
+    is_arch_based = distro_name in ['arch', 'manjaro', 'endeavouros', 'garuda'] or 'arch-release' in _etc_entries()
     
     # Try to determine the default initramfs system for this distribution
     default_system = detect_default_initramfs_system(distro_name, systems, debug)
     if default_system:
         log_info(f"Detected default initramfs system for this distribution: {default_system}")
     
-    # Try updating each system that was found, prioritizing the default system
-    success = False
-    
-    # Try the default system first if we detected one
-    if default_system and default_system in systems:
-        log_info(f"Trying default initramfs system: {default_system}")
-        if default_system == 'mkinitcpio':
-            if ensure_mkinitcpio_modules(vfio_modules, debug):
-                if update_mkinitcpio(dry_run, debug):
-                    success = True
-                    return success
-        elif default_system == 'dracut':
-            if ensure_dracut_modules(vfio_modules, debug):
-                if update_dracut_custom(dry_run, debug, is_arch_based):
-                    success = True
-                    return success
-        elif default_system == 'booster':
-            if ensure_booster_modules(vfio_modules, debug):
-                if update_booster(dry_run, debug):
-                    success = True
-                    return success
-        elif default_system == 'debian':
-            if ensure_initramfs_modules_debian(vfio_modules, debug):
-                if update_initramfs_debian_based(dry_run, debug):
-                    success = True
-                    return success
-    
-    # If default system not found or failed, try distribution-specific approach
-    if not success:
-        if is_arch_based:
-            # For Arch-based systems
-            if 'mkinitcpio' in systems:
-                if ensure_mkinitcpio_modules(vfio_modules, debug):
-                    if update_mkinitcpio(dry_run, debug):
-                        success = True
-                        return success
-            if 'dracut' in systems:
-                if ensure_dracut_modules(vfio_modules, debug):
-                    if update_dracut_custom(dry_run, debug, is_arch_based):
-                        success = True
-                        return success
-        elif distro_name in ['ubuntu', 'debian', 'pop', 'linuxmint', 'elementary'] and 'debian' in systems:
-            if ensure_initramfs_modules_debian(vfio_modules, debug):
-                if update_initramfs_debian_based(dry_run, debug):
-                    success = True
-                    return success
-        elif distro_name in ['fedora', 'rhel', 'centos', 'rocky', 'alma'] and 'dracut' in systems:
-            if ensure_dracut_modules(vfio_modules, debug):
-                if update_initramfs_fedora_based(dry_run, debug):
-                    success = True
-                    return success
-    
-    # Standard priority order for other systems or if distribution-specific approach failed
-    if 'mkinitcpio' in systems and not success:
-        if ensure_mkinitcpio_modules(vfio_modules, debug):
-            if update_mkinitcpio(dry_run, debug):
-                success = True
-    
-    if 'dracut' in systems and not success:
-        if ensure_dracut_modules(vfio_modules, debug):
-            if update_dracut_custom(dry_run, debug, is_arch_based):
-                success = True
-    
-    if 'booster' in systems and not success:
-        if ensure_booster_modules(vfio_modules, debug):
-            if update_booster(dry_run, debug):
-                success = True
-                
-    if 'debian' in systems and not success:
-        if ensure_initramfs_modules_debian(vfio_modules, debug):
-            if update_initramfs_debian_based(dry_run, debug):
-                success = True
+    # (ensure config, regenerate) for each initramfs system
+    handlers = {
+        'mkinitcpio': (ensure_mkinitcpio_modules, update_mkinitcpio),
+        'dracut': (
+            ensure_dracut_modules,
+            lambda dry_run, debug: update_dracut_custom(dry_run, debug, is_arch_based)
+        ),
+        'booster': (ensure_booster_modules, update_booster),
+        'debian': (
+            ensure_initramfs_modules_debian,
+            lambda dry_run, debug: update_initramfs_debian_based(dry_run, debug, already_configured=True)
+        ),
+    }
+    
+    # Try the default system first, then the distribution's preferred
+    # systems, then the standard priority order. Each system is tried once.
+    if is_arch_based:
+        distro_priority = ['mkinitcpio', 'dracut']
+    elif distro_name in ['ubuntu', 'debian', 'pop', 'linuxmint', 'elementary']:
+        distro_priority = ['debian']
+    elif distro_name in ['fedora', 'rhel', 'centos', 'rocky', 'alma']:
+        distro_priority = ['dracut']
+    else:
+        distro_priority = []
+    candidates = dict.fromkeys([default_system] + distro_priority + ['mkinitcpio', 'dracut', 'booster', 'debian'])
+    
+    tried: Set[str] = set()
+    for system in candidates:
+        if system not in systems:
+            continue
+        if system == default_system:
+            log_info(f"Trying default initramfs system: {system}")
+        tried.add(system)
+        ensure_modules, regenerate = handlers[system]
+        if ensure_modules(vfio_modules, debug) and regenerate(dry_run, debug):
+            return True
     
-    # If still no success, try generic approach
-    if not success:
-        log_warning("Distribution-specific approach failed or unsupported distribution.")
-        log_warning("Attempting generic initramfs update approach...")
-        success = update_initramfs_generic(dry_run, debug)
+    # Every candidate failed (or none applied), so fall back to the generic approach
+    log_warning("Distribution-specific approach failed or unsupported distribution.")
+    log_warning("Attempting generic initramfs update approach...")
+    # Don't run a generator that has already failed above a second time
+    skip_tools = {_GENERIC_TOOL_BY_SYSTEM[system] for system in tried if system in _GENERIC_TOOL_BY_SYSTEM}
+    return update_initramfs_generic(dry_run, debug, skip_tools=skip_tools)
+
+
+def _read_text_or_none(path) -> Optional[str]:
+    """Return a file's text, or None if it doesn't exist or can't be read."""
+    try:
+        return Path(path).read_text()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _replace_file_text(path: str, text: str) -> None:
+    """Replace a file's contents atomically (temp file + os.replace).
+
+    A symlinked path is resolved so its target is replaced, not the link. The
+    new file keeps the old one's owner, mode and SELinux label, and both it
+    and the directory entry are fsynced before returning.
+    """
+    path = os.path.realpath(path)
+    st = os.stat(path)
+    tmp_path = f"{path}.vfio_tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chown(tmp_path, st.st_uid, st.st_gid)
+        os.chmod(tmp_path, st.st_mode & 0o7777)
+        try:
+            os.setxattr(tmp_path, 'security.selinux', os.getxattr(path, 'security.selinux'))
+        except OSError:
+            pass  # No SELinux label to carry over
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
     
-    return success
+    dir_fd = os.open(os.path.dirname(path), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
 
 
+def _write_text(path: str, text: str) -> bool:
+    """Replace a file's text via _replace_file_text, logging any failure."""
+    try:
+        _replace_file_text(path, text)
+        return True
+    except Exception as e:
+        log_error(f"Failed to update {path}: {e}")
+        return False
+
+
+def _dir_names(path: str) -> Set[str]:
+    """Return the entry names in a directory, or an empty set if it can't be read."""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
+
+@cached_result('initramfs_etc_entries')
+def _etc_entries() -> Set[str]:
+    """Return the entry names in /etc, read once and shared by the config probes."""
+    return _dir_names('/etc')
+
+
+@cached_result('initramfs_systems')
 def detect_initramfs_systems(debug: bool = False) -> Set[str]:
     """
     Detect which initramfs systems are present on the system.
@@ -147,26 +184,28 @@ def detect_initramfs_systems(debug: bool = False) -> Set[str]:
         Set of strings representing detected initramfs systems
     """
     systems = set()
+    # One directory read instead of a stat per config path
+    etc_entries = _etc_entries()
     
     # Check for mkinitcpio
-    if Path('/etc/mkinitcpio.conf').exists() or shutil.which('mkinitcpio'):
+    if 'mkinitcpio.conf' in etc_entries or has_command('mkinitcpio'):
         systems.add('mkinitcpio')
         log_debug("Detected mkinitcpio initramfs system", debug)
     
     # Check for dracut
-    if (Path('/etc/dracut.conf').exists() or 
-        Path('/etc/dracut.conf.d').exists() or 
-        shutil.which('dracut')):
+    if ('dracut.conf' in etc_entries or 
+        'dracut.conf.d' in etc_entries or 
+        has_command('dracut')):
         systems.add('dracut')
         log_debug("Detected dracut initramfs system", debug)
     
     # Check for booster
-    if Path('/etc/booster.yaml').exists() or Path('/etc/booster.d').exists() or shutil.which('booster'):
+    if 'booster.yaml' in etc_entries or 'booster.d' in etc_entries or has_command('booster'):
         systems.add('booster')
         log_debug("Detected booster initramfs system", debug)
         
     # Check for Debian/Ubuntu/Pop!_OS (update-initramfs)
-    if Path('/etc/initramfs-tools').exists() or shutil.which('update-initramfs'):
+    if 'initramfs-tools' in etc_entries or has_command('update-initramfs'):
         systems.add('debian')
         log_debug("Detected Debian/Ubuntu/Pop!_OS initramfs system (update-initramfs)", debug)
     
@@ -185,22 +224,6 @@ def detect_default_initramfs_system(distro_name: str, detected_systems: Set[str]
     Returns:
         String with default system name or None if unknown
     """
-    # Check for systemd-boot or dracut symlinks in /usr/lib/kernel
-    is_dracut_default = (
-        os.path.exists("/usr/lib/dracut/dracut.conf.d") or
-        os.path.exists("/usr/lib/kernel/install.d/50-dracut.install")
-    )
-    
-    is_mkinitcpio_default = (
-        os.path.exists("/usr/lib/kernel/install.d/50-mkinitcpio.install") or
-        os.path.exists("/usr/share/libalpm/hooks/60-mkinitcpio-remove.hook")
-    )
-    
-    is_booster_default = (
-        os.path.exists("/usr/lib/kernel/install.d/50-booster.install") or
-        os.path.exists("/usr/lib/booster")
-    )
-    
     # Specific distribution checks
     if distro_name in ['arch', 'manjaro']:
         return 'mkinitcpio' if 'mkinitcpio' in detected_systems else None
@@ -217,6 +240,7 @@ def detect_default_initramfs_system(distro_name: str, detected_systems: Set[str]
         return 'dracut' if 'dracut' in detected_systems else None
     
     # If no specific distro match, use file-based detection
+    is_dracut_default, is_mkinitcpio_default, is_booster_default = _initramfs_default_markers()
     if is_dracut_default and 'dracut' in detected_systems:
         return 'dracut'
     elif is_mkinitcpio_default and 'mkinitcpio' in detected_systems:
@@ -231,6 +255,44 @@ def detect_default_initramfs_system(distro_name: str, detected_systems: Set[str]
     return None
 
 
+@cached_result('initramfs_default_markers')
+def _initramfs_default_markers() -> Tuple[bool, bool, bool]:
+    """Return whether dracut, mkinitcpio and booster look like the default generator."""
+    # Check for systemd-boot or dracut symlinks in /usr/lib/kernel
+    # (one directory read covers all three kernel-install plugins)
+    install_d = _dir_names("/usr/lib/kernel/install.d")
+    
+    is_dracut_default = (
+        '50-dracut.install' in install_d or
+        os.path.exists("/usr/lib/dracut/dracut.conf.d")
+    )
+    
+    is_mkinitcpio_default = (
+        '50-mkinitcpio.install' in install_d or
+        os.path.exists("/usr/share/libalpm/hooks/60-mkinitcpio-remove.hook")
+    )
+    
+    is_booster_default = (
+        '50-booster.install' in install_d or
+        os.path.exists("/usr/lib/booster")
+    )
+    return is_dracut_default, is_mkinitcpio_default, is_booster_default
+
+
+def _run_initramfs_command(cmd: List[str], dry_run: bool, debug: bool, tool: Optional[str] = None) -> bool:
+    """Run an initramfs generator command and log the outcome (dry-run only announces it)."""
+    if dry_run:
+        log_info(f"Dry run enabled, not executing: {shlex.join(cmd)}")
+        return True
+    log_info(f"Running: {shlex.join(cmd)}")
+    with_tool = f" with {tool}" if tool else ""
+    if run_command(cmd, debug=debug) is not None:
+        log_success(f"Successfully updated initramfs{with_tool}.")
+        return True
+    log_error(f"Failed to update initramfs{with_tool}.")
+    return False
+
+
 def update_mkinitcpio(dry_run: bool = False, debug: bool = False) -> bool:
     """
     Update initramfs using mkinitcpio.
@@ -238,19 +300,7 @@ def update_mkinitcpio(dry_run: bool = False, debug: bool = False) -> bool:
     Returns:
         True if successful, False otherwise.
     """
-    cmd = "mkinitcpio -P"
-    log_info(f"Running: {cmd}")
-    if dry_run:
-        log_info("Dry run enabled, not executing command.")
-        return True
-    output = run_command(cmd, debug=debug)
-    
-    if output is not None:
-        log_success("Successfully updated initramfs with mkinitcpio.")
-        return True
-    else:
-        log_error("Failed to update initramfs with mkinitcpio.")
-        return False
+    return _run_initramfs_command(["mkinitcpio", "-P"], dry_run, debug, tool='mkinitcpio')
 
 
 def update_dracut_custom(dry_run: bool = False, debug: bool = False, is_arch_based: bool = False) -> bool:
@@ -269,28 +319,11 @@ def update_dracut_custom(dry_run: bool = False, debug: bool = False, is_arch_bas
         # For Arch-based systems, we need to specify the output path
         try:
             # Try to determine the kernel version
-            kernel_ver = run_command("uname -r", debug=debug)
+            kernel_ver = _kernel_release()
             if kernel_ver:
-                kernel_ver = kernel_ver.strip()
-                
-                # Create the target path for initramfs
-                initramfs_dir = "/boot"
-                os.makedirs(initramfs_dir, exist_ok=True)
-                
                 # On some systems like Garuda we need to use a specific output path
-                cmd = f"dracut -f /boot/initramfs-{kernel_ver}.img {kernel_ver}"
-                log_info(f"Running: {cmd}")
-                if dry_run:
-                    log_info("Dry run enabled, not executing command.")
-                    return True
-                output = run_command(cmd, debug=debug)
-                
-                if output is not None:
-                    log_success("Successfully updated initramfs with dracut.")
-                    return True
-                else:
-                    log_error("Failed to update initramfs with dracut.")
-                    return False
+                cmd = ["dracut", "-f", f"/boot/initramfs-{kernel_ver}.img", kernel_ver]
+                return _run_initramfs_command(cmd, dry_run, debug, tool='dracut')
             else:
                 log_error("Failed to determine kernel version for dracut.")
                 return False
@@ -299,19 +332,7 @@ def update_dracut_custom(dry_run: bool = False, debug: bool = False, is_arch_bas
             return False
     else:
         # Standard dracut command for non-Arch systems
-        cmd = "dracut --force"
-        log_info(f"Running: {cmd}")
-        if dry_run:
-            log_info("Dry run enabled, not executing command.")
-            return True
-        output = run_command(cmd, debug=debug)
-        
-        if output is not None:
-            log_success("Successfully updated initramfs with dracut.")
-            return True
-        else:
-            log_error("Failed to update initramfs with dracut.")
-            return False
+        return _run_initramfs_command(["dracut", "--force"], dry_run, debug, tool='dracut')
 
 
 def update_booster(dry_run: bool = False, debug: bool = False) -> bool:
@@ -321,19 +342,7 @@ def update_booster(dry_run: bool = False, debug: bool = False) -> bool:
     Returns:
         True if successful, False otherwise.
     """
-    cmd = "booster build"
-    log_info(f"Running: {cmd}")
-    if dry_run:
-        log_info("Dry run enabled, not executing command.")
-        return True
-    output = run_command(cmd, debug=debug)
-    
-    if output is not None:
-        log_success("Successfully updated initramfs with booster.")
-        return True
-    else:
-        log_error("Failed to update initramfs with booster.")
-        return False
+    return _run_initramfs_command(["booster", "build"], dry_run, debug, tool='booster')
 
 
 def ensure_booster_modules(modules: List[str], debug: bool = False) -> bool:
@@ -351,14 +360,6 @@ def ensure_booster_modules(modules: List[str], debug: bool = False) -> bool:
     booster_path = Path('/etc/booster.yaml')
     booster_dir = Path('/etc/booster.d')
     
-    # Create directory if needed
-    if not booster_dir.exists():
-        try:
-            booster_dir.mkdir(parents=True, exist_ok=True)
-        except Exception as e:
-            log_error(f"Failed to create directory {booster_dir}: {e}")
-            return False
-    
     # Use booster.d directory for our configuration
     vfio_booster_path = booster_dir / 'vfio.yaml'
     
@@ -366,8 +367,23 @@ def ensure_booster_modules(modules: List[str], debug: bool = False) -> bool:
     modules_str = ",".join(modules)
     config_content = f"modules_force_load: {modules_str}\n"
     
+    # Nothing to do if a previous run already wrote this exact config
+    existing_content = _read_text_or_none(vfio_booster_path)
+    if existing_content == config_content:
+        log_info(f"Booster configuration at {vfio_booster_path} is already up to date.")
+        return True
+    
+    # Create directory if needed (it must exist if the config file does)
+    if existing_content is None:
+        try:
+            booster_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            log_error(f"Failed to create directory {booster_dir}: {e}")
+            return False
+    
     try:
-        backup_path = create_timestamped_backup(str(vfio_booster_path), False, debug)
+        if existing_content is not None:
+            create_timestamped_backup(str(vfio_booster_path), False, debug)
         
         # Write the configuration
         vfio_booster_path.write_text(config_content)
@@ -379,42 +395,31 @@ def ensure_booster_modules(modules: List[str], debug: bool = False) -> bool:
         return False
 
 
-def update_initramfs_debian_based(dry_run: bool = False, debug: bool = False) -> bool:
+def update_initramfs_debian_based(dry_run: bool = False, debug: bool = False, already_configured: bool = False) -> bool:
     """
     Updates the initramfs on Debian-based systems using update-initramfs.
     
+    Args:
+        dry_run: If True, simulate operations without making changes.
+        debug: If True, print debug messages.
+        already_configured: If True, the caller has already run
+            ensure_initramfs_modules_debian() and it is not repeated.
+    
     Returns:
         True if successful, False otherwise.
     """
     # Check if update-initramfs exists
-    update_bin = shutil.which('update-initramfs')
-    if not update_bin:
+    if not has_command('update-initramfs'):
         log_error("update-initramfs not found. Is initramfs-tools installed?")
         return False
     
     # Ensure vfio modules will be loaded
-    # Get kernel version to check if vfio_virqfd is needed
-    kernel_version = get_kernel_version()
-    modules_to_add = ['vfio', 'vfio_iommu_type1', 'vfio_pci']
-    if kernel_version and (kernel_version[0] < 6 or (kernel_version[0] == 6 and kernel_version[1] < 2)):
-        modules_to_add.append('vfio_virqfd')
-        
-    ensure_initramfs_modules_debian(modules_to_add, debug)
+    if not already_configured:
+        modules_to_add = get_vfio_initramfs_modules(debug=debug)
+        ensure_initramfs_modules_debian(modules_to_add, debug)
     
     # Update all initramfs images
-    cmd = "update-initramfs -u -k all"
-    log_info(f"Running: {cmd}")
-    if dry_run:
-        log_info("Dry run enabled, not executing command.")
-        return True
-    output = run_command(cmd, debug=debug)
-    
-    if output is not None:
-        log_success("Successfully updated initramfs.")
-        return True
-    else:
-        log_error("Failed to update initramfs.")
-        return False
+    return _run_initramfs_command(["update-initramfs", "-u", "-k", "all"], dry_run, debug)
 
 
 def ensure_initramfs_modules_debian(modules: List[str], debug: bool = False) -> bool:
@@ -431,41 +436,35 @@ def ensure_initramfs_modules_debian(modules: List[str], debug: bool = False) ->
     # Path to the modules file
     modules_file = "/etc/initramfs-tools/modules"
     
-    # Check if the file exists
-    if not os.path.isfile(modules_file):
+    # Collect the module listed on each line (its first word, ignoring
+    # comments), streaming the file instead of reading it whole
+    present: Set[str] = set()
+    try:
+        with open(modules_file) as f:
+            for line in f:
+                words = line.split('#', 1)[0].split()
+                if words:
+                    present.add(words[0])
+    except FileNotFoundError:
         log_error(f"Modules file not found: {modules_file}")
         log_error("Is initramfs-tools installed correctly?")
         return False
-        
-    # Backup the file
-    if not backup_file(modules_file):
-        log_warning(f"Could not back up {modules_file}. Proceeding anyway.")
-    
-    # Read the current content
-    try:
-        with open(modules_file, 'r') as f:
-            content = f.read()
     except Exception as e:
         log_error(f"Failed to read {modules_file}: {e}")
         return False
-        
-    # Check if each module is already in the file
-    lines = content.splitlines()
-    modules_to_add = []
     
-    for module in modules:
-        # Check if the module is already in the file (ignoring comments)
-        if not any(re.search(rf"^\s*{module}\s*($|\s+)", line) for line in lines):
-            modules_to_add.append(module)
+    modules_to_add = [m for m in modules if m not in present]
     
     # If there are modules to add, update the file
     if modules_to_add:
+        # Backup the file (only now that it is going to change)
+        if not backup_file(modules_file):
+            log_warning(f"Could not back up {modules_file}. Proceeding anyway.")
         try:
             with open(modules_file, 'a') as f:
-                f.write("\n# Added by VFIO Configurator\n")
-                for module in modules_to_add:
-                    f.write(f"{module}\n")
-                    log_info(f"Added module to initramfs: {module}")
+                f.write("\n# Added by VFIO Configurator\n" + "\n".join(modules_to_add) + "\n")
+            for module in modules_to_add:
+                log_info(f"Added module to initramfs: {module}")
             log_success(f"Updated {modules_file} with required modules.")
         except Exception as e:
             log_error(f"Failed to update {modules_file}: {e}")
@@ -484,34 +483,16 @@ def update_initramfs_fedora_based(dry_run: bool = False, debug: bool = False) ->
         True if successful, False otherwise.
     """
     # Check if dracut exists
-    dracut_bin = shutil.which('dracut')
-    if not dracut_bin:
+    if not has_command('dracut'):
         log_error("dracut not found. Is it installed?")
         return False
     
     # Ensure the appropriate config exists in /etc/dracut.conf.d/
-    # Get kernel version to check if vfio_virqfd is needed
-    kernel_version = get_kernel_version()
-    modules_to_add = ['vfio', 'vfio_iommu_type1', 'vfio_pci']
-    if kernel_version and (kernel_version[0] < 6 or (kernel_version[0] == 6 and kernel_version[1] < 2)):
-        modules_to_add.append('vfio_virqfd')
-        
+    modules_to_add = get_vfio_initramfs_modules(debug=debug)
     ensure_dracut_modules(modules_to_add, debug)
     
     # Regenerate all initramfs images 
-    cmd = "dracut -f"
-    log_info(f"Running: {cmd}")
-    if dry_run:
-        log_info("Dry run enabled, not executing command.")
-        return True
-    output = run_command(cmd, debug=debug)
-    
-    if output is not None:
-        log_success("Successfully updated initramfs.")
-        return True
-    else:
-        log_error("Failed to update initramfs.")
-        return False
+    return _run_initramfs_command(["dracut", "-f"], dry_run, debug)
 
 
 def ensure_dracut_modules(modules: List[str], debug: bool = False) -> bool:
@@ -529,25 +510,32 @@ def ensure_dracut_modules(modules: List[str], debug: bool = False) -> bool:
     config_dir = "/etc/dracut.conf.d"
     config_file = os.path.join(config_dir, "vfio.conf")
     
-    # Create the config directory if it doesn't exist
-    if not os.path.isdir(config_dir):
-        try:
-            os.makedirs(config_dir, exist_ok=True)
-            log_info(f"Created directory: {config_dir}")
-        except Exception as e:
-            log_error(f"Failed to create directory {config_dir}: {e}")
-            return False
-    
     # Space-separated list of modules with quotes for force_drivers
     modules_str = " ".join(modules)
-    config_content = f'force_drivers+=" {modules_str} "\n'
+    config_content = f'# Generated by VFIO Configurator\nforce_drivers+=" {modules_str} "\n'
+    
+    # Nothing to do if a previous run already wrote this exact config
+    existing_content = _read_text_or_none(config_file)
+    if existing_content == config_content:
+        log_info(f"Dracut configuration at {config_file} is already up to date.")
+        return True
+    
+    # Create the config directory if it doesn't exist
+    try:
+        os.makedirs(config_dir)
+        log_info(f"Created directory: {config_dir}")
+    except FileExistsError:
+        pass
+    except Exception as e:
+        log_error(f"Failed to create directory {config_dir}: {e}")
+        return False
     
     try:
-        backup_path = create_timestamped_backup(config_file, False, debug)
+        if existing_content is not None:
+            create_timestamped_backup(config_file, False, debug)
         
         # Write the configuration
         with open(config_file, 'w') as f:
-            f.write("# Generated by VFIO Configurator\n")
             f.write(config_content)
         log_success(f"Created/updated dracut configuration at {config_file}")
         return True
@@ -565,26 +553,22 @@ def update_initramfs_arch_based(dry_run: bool = False, debug: bool = False) -> b
         True if successful, False otherwise.
     """
     # First check for mkinitcpio - the preferred tool for Arch-based systems
-    mkinitcpio_bin = shutil.which('mkinitcpio')
-    if not mkinitcpio_bin:
+    has_mkinitcpio = has_command('mkinitcpio')
+    if not has_mkinitcpio:
         log_error("mkinitcpio not found. You may need to manually install it.")
         return False
     
-    # Get list of modules to add
-    kernel_version = get_kernel_version()
-    modules_to_add = ['vfio', 'vfio_iommu_type1', 'vfio_pci']
-    if kernel_version and (kernel_version[0] < 6 or (kernel_version[0] == 6 and kernel_version[1] < 2)):
-        modules_to_add.append('vfio_virqfd')
+    modules_to_add = get_vfio_initramfs_modules(debug=debug)
     
     success = False
     
     # Try mkinitcpio if available
-    if mkinitcpio_bin:
+    if has_mkinitcpio:
         # Ensure modules are in mkinitcpio.conf
         if ensure_mkinitcpio_modules(modules_to_add, debug):
             # First try the standard command
-            cmd = "mkinitcpio -P"
-            log_info(f"Running: {cmd}")
+            cmd = ["mkinitcpio", "-P"]
+            log_info(f"Running: {shlex.join(cmd)}")
             if dry_run:
                 log_info("Dry run enabled, not executing command.")
                 return True
@@ -598,19 +582,21 @@ def update_initramfs_arch_based(dry_run: bool = False, debug: bool = False) -> b
                 log_warning("Standard mkinitcpio command failed, trying alternative approach...")
                 
                 # Get list of installed kernels
-                kernel_cmd = "ls /usr/lib/modules/"
-                kernel_list = run_command(kernel_cmd, debug=debug)
-                if kernel_list:
-                    kernels = kernel_list.strip().split('\n')
+                try:
+                    with os.scandir("/usr/lib/modules") as entries:
+                        kernels = sorted(entry.name for entry in entries if entry.is_dir())
+                except OSError as e:
+                    log_debug(f"Could not list /usr/lib/modules: {e}", debug)
+                    kernels = []
+                if kernels:
                     for kernel in kernels:
-                        if os.path.isdir(f"/usr/lib/modules/{kernel}"):
-                            # Try to build initramfs for each kernel specifically
-                            cmd = f"mkinitcpio -p {kernel}"
-                            log_info(f"Building initramfs for kernel: {kernel}")
-                            output = run_command(cmd, debug=debug)
-                            if output is not None:
-                                log_success(f"Successfully built initramfs for kernel: {kernel}")
-                                success = True
+                        # Try to build initramfs for each kernel specifically
+                        cmd = ["mkinitcpio", "-p", kernel]
+                        log_info(f"Building initramfs for kernel: {kernel}")
+                        output = run_command(cmd, debug=debug)
+                        if output is not None:
+                            log_success(f"Successfully built initramfs for kernel: {kernel}")
+                            success = True
                     
                     if success:
                         log_success("Successfully updated initramfs for all available kernels.")
@@ -623,36 +609,18 @@ def update_initramfs_arch_based(dry_run: bool = False, debug: bool = False) -> b
                     return False
     
     # If mkinitcpio failed or isn't available, check for dracut as a fallback on Arch
-    dracut_bin = shutil.which('dracut')
-    if dracut_bin and not success:
+    if has_command('dracut') and not success:
         log_info("Attempting to use dracut as fallback on Arch-based system")
         # Configure dracut to include VFIO modules
         if ensure_dracut_modules(modules_to_add, debug):
             # Try to use dracut in a more Arch-friendly way
             try:
                 # Try to determine the kernel version
-                kernel_ver = run_command("uname -r", debug=debug)
+                kernel_ver = _kernel_release()
                 if kernel_ver:
-                    kernel_ver = kernel_ver.strip()
-                    
-                    # Create the target path for initramfs
-                    initramfs_dir = "/boot"
-                    os.makedirs(initramfs_dir, exist_ok=True)
-                    
                     # On some systems like Garuda we need to use a specific output path
-                    cmd = f"dracut -f /boot/initramfs-{kernel_ver}.img {kernel_ver}"
-                    log_info(f"Running: {cmd}")
-                    if dry_run:
-                        log_info("Dry run enabled, not executing command.")
-                        return True
-                    output = run_command(cmd, debug=debug)
-                    
-                    if output is not None:
-                        log_success("Successfully updated initramfs with dracut.")
-                        return True
-                    else:
-                        log_error("Failed to update initramfs with dracut.")
-                        return False
+                    cmd = ["dracut", "-f", f"/boot/initramfs-{kernel_ver}.img", kernel_ver]
+                    return _run_initramfs_command(cmd, dry_run, debug, tool='dracut')
                 else:
                     log_error("Failed to determine kernel version for dracut.")
                     return False
@@ -681,42 +649,33 @@ def ensure_mkinitcpio_modules(modules: List[str], debug: bool = False) -> bool:
     # Path to mkinitcpio.conf
     config_file = "/etc/mkinitcpio.conf"
     
-    # Check if the file exists
-    if not os.path.isfile(config_file):
-        log_error(f"Configuration file not found: {config_file}")
-        return False
-        
-    # Backup the file
-    if not backup_file(config_file):
-        log_warning(f"Could not back up {config_file}. Proceeding anyway.")
-    
     # Read the current content
     try:
-        with open(config_file, 'r') as f:
-            content = f.read()
+        content = Path(config_file).read_text()
+    except FileNotFoundError:
+        log_error(f"Configuration file not found: {config_file}")
+        return False
     except Exception as e:
         log_error(f"Failed to read {config_file}: {e}")
         return False
-        
+
     # Check and update MODULES array in mkinitcpio.conf
-    modules_regex = r'^MODULES\s*=\s*\((.*?)\)'
-    match = re.search(modules_regex, content, re.MULTILINE)
+    match = _MODULES_RE.search(content)
     
     # Also ensure modconf hook is present 
-    hooks_regex = r'^HOOKS\s*=\s*\((.*?)\)'
-    hooks_match = re.search(hooks_regex, content, re.MULTILINE)
+    hooks_match = _HOOKS_RE.search(content)
     
     modules_str = " ".join(modules)
-    new_content = content
-    changes_needed = False
+    # (start, end, replacement) spans of the original content to rewrite
+    edits: List[Tuple[int, int, str]] = []
     
     # Handle MODULES line
     if match:
         # Extract existing modules
         existing_modules = match.group(1).strip()
         # Check which VFIO modules are already present
-        existing_modules_list = [m.strip() for m in existing_modules.split()]
-        vfio_modules_needed = [m for m in modules if m not in existing_modules_list]
+        existing_modules_set = set(existing_modules.split())
+        vfio_modules_needed = [m for m in modules if m not in existing_modules_set]
         
         if vfio_modules_needed:
             # Add the missing VFIO modules at the beginning to ensure they load first
@@ -724,19 +683,17 @@ def ensure_mkinitcpio_modules(modules: List[str], debug: bool = False) -> bool:
                 new_modules_line = f"MODULES=({modules_str} {existing_modules})"
             else:
                 new_modules_line = f"MODULES=({modules_str})"
-            new_content = re.sub(modules_regex, new_modules_line, new_content, flags=re.MULTILINE)
-            changes_needed = True
+            edits.append((match.start(), match.end(), new_modules_line))
             log_success(f"Adding VFIO modules to mkinitcpio.conf: {', '.join(vfio_modules_needed)}")
     else:
         # No MODULES line found, add one
-        new_content = f"MODULES=({modules_str})\n" + new_content
-        changes_needed = True
+        edits.append((0, 0, f"MODULES=({modules_str})\n"))
         log_success(f"Adding MODULES line with VFIO modules to mkinitcpio.conf")
     
     # Ensure modconf hook is present
     if hooks_match:
         existing_hooks = hooks_match.group(1).strip()
-        existing_hooks_list = [h.strip() for h in existing_hooks.split()]
+        existing_hooks_list = existing_hooks.split()
         
         if 'modconf' not in existing_hooks_list:
             # Add modconf hook if missing (after base hook if present)
@@ -748,20 +705,22 @@ def ensure_mkinitcpio_modules(modules: List[str], debug: bool = False) -> bool:
                 existing_hooks_list.insert(0, 'modconf')
             
             new_hooks_line = f"HOOKS=({' '.join(existing_hooks_list)})"
-            new_content = re.sub(hooks_regex, new_hooks_line, new_content, flags=re.MULTILINE)
-            changes_needed = True
+            edits.append((hooks_match.start(), hooks_match.end(), new_hooks_line))
             log_success("Adding modconf hook to mkinitcpio.conf")
     
     # Write the updated content if changes were made
-    if changes_needed:
-        try:
-            with open(config_file, 'w') as f:
-                f.write(new_content)
-            log_success(f"Updated {config_file} with required modules and hooks")
-            return True
-        except Exception as e:
-            log_error(f"Failed to update {config_file}: {e}")
+    if edits:
+        # Splice from the end so earlier offsets stay valid
+        new_content = content
+        for start, end, replacement in sorted(edits, reverse=True):
+            new_content = f"{new_content[:start]}{replacement}{new_content[end:]}"
+        # Backup the file (only now that it is going to change)
+        if not backup_file(config_file):
+            log_warning(f"Could not back up {config_file}. Proceeding anyway.")
+        if not _write_text(config_file, new_content):
             return False
+        log_success(f"Updated {config_file} with required modules and hooks")
+        return True
     else:
         log_info("mkinitcpio.conf is already configured with all required modules and hooks.")
         return True
@@ -775,35 +734,18 @@ def update_initramfs_suse_based(dry_run: bool = False, debug: bool = False) -> b
         True if successful, False otherwise.
     """
     # Check if mkinitrd exists
-    mkinitrd_bin = shutil.which('mkinitrd')
-    if not mkinitrd_bin:
+    if not has_command('mkinitrd'):
         log_error("mkinitrd not found. Is it installed?")
         return False
     
-    # Get kernel version to check if vfio_virqfd is needed
-    kernel_version = get_kernel_version()
-    modules_to_add = ['vfio', 'vfio_iommu_type1', 'vfio_pci']
-    if kernel_version and (kernel_version[0] < 6 or (kernel_version[0] == 6 and kernel_version[1] < 2)):
-        modules_to_add.append('vfio_virqfd')
+    modules_to_add = get_vfio_initramfs_modules(debug=debug)
     
     # Ensure the appropriate modules are in the config
     if not ensure_suse_modules(modules_to_add, debug):
         return False
     
     # Regenerate the initramfs 
-    cmd = "mkinitrd"
-    log_info(f"Running: {cmd}")
-    if dry_run:
-        log_info("Dry run enabled, not executing command.")
-        return True
-    output = run_command(cmd, debug=debug)
-    
-    if output is not None:
-        log_success("Successfully updated initramfs.")
-        return True
-    else:
-        log_error("Failed to update initramfs.")
-        return False
+    return _run_initramfs_command(["mkinitrd"], dry_run, debug)
 
 
 def ensure_suse_modules(modules: List[str], debug: bool = False) -> bool:
@@ -820,86 +762,118 @@ def ensure_suse_modules(modules: List[str], debug: bool = False) -> bool:
     # Path to SUSE config (could be in /etc/dracut.conf.d/ for newer versions)
     config_file = "/etc/sysconfig/kernel"
     dracut_dir = "/etc/dracut.conf.d"
-    dracut_file = os.path.join(dracut_dir, "vfio.conf")
+    
+    # Read the SUSE config directly; a missing file means falling back to dracut
+    try:
+        content = Path(config_file).read_text()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        content = None
+    except Exception as e:
+        log_error(f"Failed to read {config_file}: {e}")
+        return False
     
     # Try the SUSE specific method first
-    if os.path.isfile(config_file):
-        # Backup the file
-        if not backup_file(config_file):
-            log_warning(f"Could not back up {config_file}. Proceeding anyway.")
-        
-        # Read the current content
-        try:
-            with open(config_file, 'r') as f:
-                content = f.read()
-        except Exception as e:
-            log_error(f"Failed to read {config_file}: {e}")
-            return False
-            
+    if content is not None:
         # Check if INITRD_MODULES line exists
-        initrd_regex = r'^INITRD_MODULES="([^"]*)"'
-        match = re.search(initrd_regex, content, re.MULTILINE)
+        # INITRD_MODULES="<modules>"<rest of line>; find where <modules> sits in content
+        prefix = 'INITRD_MODULES="'
+        value_span = None
+        offset = 0
+        for line in content.splitlines(keepends=True):
+            if line.startswith(prefix):
+                close_quote = line.find('"', len(prefix))
+                if close_quote != -1:
+                    value_span = (offset + len(prefix), offset + close_quote)
+                    break
+            offset += len(line)
         
-        if match:
-            current_modules = [m.strip() for m in match.group(1).split() if m.strip()]
-            missing_modules = [m for m in modules if m not in current_modules]
+        if value_span is not None:
+            value_start, value_end = value_span
+            current_modules = content[value_start:value_end].split()
             
-            if not missing_modules:
+            if set(current_modules).issuperset(modules):
                 log_info("All required modules already in SUSE kernel configuration.")
                 return True
-                
-            # Update the INITRD_MODULES line
-            new_modules_line = f'INITRD_MODULES="{" ".join(current_modules + missing_modules)}"'
-            updated_content = re.sub(initrd_regex, new_modules_line, content, flags=re.MULTILINE)
             
-            # Write the updated content
-            try:
-                with open(config_file, 'w') as f:
-                    f.write(updated_content)
-                log_success(f"Updated {config_file} with required modules.")
-                return True
-            except Exception as e:
-                log_error(f"Failed to update {config_file}: {e}")
-                return False
+            # Splice in the new module list, keeping existing order and dropping duplicates
+            merged_modules = dict.fromkeys(current_modules + list(modules))
+            updated_content = f'{content[:value_start]}{" ".join(merged_modules)}{content[value_end:]}'
+            success_message = f"Updated {config_file} with required modules."
         else:
             # If INITRD_MODULES line doesn't exist, append it
-            try:
-                with open(config_file, 'a') as f:
-                    f.write("\n# Added by VFIO Configurator\n")
-                    f.write(f'INITRD_MODULES="{" ".join(modules)}"\n')
-                log_success(f"Added INITRD_MODULES to {config_file}.")
-                return True
-            except Exception as e:
-                log_error(f"Failed to update {config_file}: {e}")
-                return False
+            updated_content = f'{content}\n# Added by VFIO Configurator\nINITRD_MODULES="{" ".join(modules)}"\n'
+            success_message = f"Added INITRD_MODULES to {config_file}."
+        
+        # Backup the file (only now that it is going to change)
+        if not backup_file(config_file):
+            log_warning(f"Could not back up {config_file}. Proceeding anyway.")
+        if not _write_text(config_file, updated_content):
+            return False
+        log_success(success_message)
+        return True
     # Try using dracut method for newer SUSE versions
     elif os.path.isdir(dracut_dir):
         return ensure_dracut_modules(modules, debug)
     else:
         log_error("Could not find an appropriate method to update initramfs modules.")
-        log_error("You may need to manually add vfio, vfio_iommu_type1, vfio_pci to your initramfs.")
+        log_error(f"You may need to manually add {', '.join(_BASE_VFIO_MODULES)} to your initramfs.")
         return False
 
 
-def update_initramfs_generic(dry_run: bool = False, debug: bool = False) -> bool:
+# Initramfs tool used by update_initramfs_generic for an os-release ID/ID_LIKE
+_GENERIC_TOOL_BY_DISTRO = {
+    'debian': 'update-initramfs',
+    'ubuntu': 'update-initramfs',
+    'fedora': 'dracut',
+    'rhel': 'dracut',
+    'arch': 'mkinitcpio',
+    'suse': 'mkinitrd',
+    'opensuse': 'mkinitrd',
+}
+# Tool that update_initramfs_generic would run again for a system update_initramfs already tried
+_GENERIC_TOOL_BY_SYSTEM = {
+    'debian': 'update-initramfs',
+    'dracut': 'dracut',
+    'mkinitcpio': 'mkinitcpio',
+}
+
+
+def update_initramfs_generic(dry_run: bool = False, debug: bool = False,
+                             skip_tools: Iterable[str] = ()) -> bool:
     """
     Generic method to update initramfs when distribution-specific method is not available.
     
+    Args:
+        dry_run: If True, simulate operations without making changes.
+        debug: Enable debug output.
+        skip_tools: Tools that have already been tried and should not be run again.
+    
     Returns:
         True if one method succeeds, False otherwise.
     """
     log_warning("Using fallback methods to update initramfs...")
     
     # Try various common methods in order
-    methods = [
-        ('update-initramfs', update_initramfs_debian_based),
-        ('dracut', update_initramfs_fedora_based),
-        ('mkinitcpio', update_initramfs_arch_based),
-        ('mkinitrd', update_initramfs_suse_based)
-    ]
-    
-    for command, method in methods:
-        if shutil.which(command):
+    methods = {
+        'update-initramfs': update_initramfs_debian_based,
+        'dracut': update_initramfs_fedora_based,
+        'mkinitcpio': update_initramfs_arch_based,
+        'mkinitrd': update_initramfs_suse_based,
+    }
+    
+    # Put the tool the distribution (or the one it derives from) uses first
+    distro_info = get_distro_info() or {}
+    distro_ids = [distro_info.get('id', '').lower()] + distro_info.get('id_like', '').lower().split()
+    preferred = next((_GENERIC_TOOL_BY_DISTRO[d] for d in distro_ids if d in _GENERIC_TOOL_BY_DISTRO), None)
+    if preferred:
+        log_debug(f"Trying {preferred} first for distribution '{distro_ids[0]}'", debug)
+        methods = {preferred: methods[preferred], **methods}
+    
+    for command, method in methods.items():
+        if command in skip_tools:
+            log_debug(f"Skipping {command}; it was already tried", debug)
+            continue
+        if has_command(command):
             log_info(f"Found {command}, attempting to use it...")
             result = method(dry_run, debug)
             if result:
@@ -910,6 +884,52 @@ def update_initramfs_generic(dry_run: bool = False, debug: bool = False) -> bool
     return False
 
 
+@cached_result('initramfs_vfio_modules')
+def _vfio_initramfs_modules(debug: bool = False) -> Tuple[str, ...]:
+    """Work out the VFIO module set for the running kernel (once per run)."""
+    modules = _BASE_VFIO_MODULES
+    # Check kernel version - add vfio_virqfd only for older kernels
+    kernel_version = get_kernel_version()
+    if kernel_version and kernel_version < (6, 2):
+        log_debug(f"Including vfio_virqfd for kernel {kernel_version}", debug)
+        return modules + ('vfio_virqfd',)
+    log_debug(f"Skipping vfio_virqfd as kernel {kernel_version} has this integrated into vfio module", debug)
+    return modules
+
+
+def get_vfio_initramfs_modules(debug: bool = False) -> List[str]:
+    """
+    Get the VFIO modules that should be included in the initramfs.
+    
+    vfio_virqfd is only added for kernels older than 6.2, where it is still
+    a separate module.
+    
+    Args:
+        debug: Enable debug output
+        
+    Returns:
+        A new list of module names (safe for the caller to modify)
+    """
+    return list(_vfio_initramfs_modules(debug=debug))
+
+
+@cached_result('initramfs_kernel_release')
+def _kernel_release() -> Optional[str]:
+    """Return the running kernel release string (what `uname -r` prints)."""
+    # uname(2) directly: one syscall, no file to open
+    try:
+        release = os.uname().release
+    except OSError:
+        release = None
+    if release:
+        return release
+    try:
+        return Path('/proc/sys/kernel/osrelease').read_text().strip() or None
+    except OSError:
+        return None
+
+
+@cached_result('initramfs_kernel_version')
 def get_kernel_version() -> Optional[Tuple[int, int, int]]:
     """
     Get the current kernel version as a tuple (major, minor, patch).
@@ -920,33 +940,40 @@ def get_kernel_version() -> Optional[Tuple[int, int, int]]:
                                          or None if version couldn't be determined
     """
     try:
-        # First attempt: Use uname -r directly
-        output = run_command("uname -r")
+        # First attempt: the release string from os.uname(), or
+        # /proc/sys/kernel/osrelease (no `uname -r` subprocess)
+        output = _kernel_release()
+        
+        if not output:
+            # Fall back to the uname binary in case /proc is unavailable
+            output = run_command(["uname", "-r"])
         
         if not output:
             # Second attempt: Try reading from /proc/version
             try:
                 with open('/proc/version', 'r') as f:
-                    output = f.read().strip()
+                    proc_version = f.read()
+                # "Linux version <release> (builder@host) (gcc ...) ..."
+                prefix, _, rest = proc_version.partition('Linux version ')
+                output = rest.partition(' ')[0] if not prefix else None
             except Exception:
                 output = None
         
         if not output:
             # Third attempt: Try using python's platform module
             try:
-                import platform
                 output = platform.release()
             except Exception:
                 log_error("Failed to determine kernel version using multiple methods")
                 return None
         
-        # Extract version numbers from string like "6.1.0-rc3-1-custom" or longer strings
-        # This regex looks for the first occurrence of major.minor(.patch) in the string
-        match = re.search(r'(\d+)\.(\d+)(?:\.(\d+))?', output)
+        # Extract version numbers from the start of a release string like
+        # "6.1.0-rc3-1-custom"
+        match = _KRELEASE_RE.match(output)
         if match:
-            major = int(match.group(1))
-            minor = int(match.group(2))
-            patch = int(match.group(3)) if match.group(3) else 0
+            major = int(match['major'])
+            minor = int(match['minor'])
+            patch = int(match['patch']) if match['patch'] else 0
             log_debug(f"Detected kernel version: {major}.{minor}.{patch}")
             return (major, minor, patch)
         else:
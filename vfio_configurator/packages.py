@@ -1,15 +1,36 @@
 """Package installation functionality for VFIO configuration."""
 
+import grp
+import hashlib
 import os
-import shutil
-from typing import List, Dict, Any, Tuple
+import pwd
+import shlex
+import subprocess
+from typing import List, Dict, Any, FrozenSet, Optional, Sequence, Tuple
 
 from .utils import (
     log_info, log_success, log_warning, log_error, log_debug,
-    run_command, get_distro_info
+    run_command, get_distro_info, cached_result, has_command
 )
 
+# Minimal package set for QEMU with TPM, OVMF and virt-manager, by group
+_MINIMAL_QEMU_PACKAGES: Dict[str, Dict[str, str]] = {
+    "core": {
+        "qemu-full": "Complete QEMU installation including all optional components",
+        "libvirt": "API for managing virtualization",
+        "virt-manager": "GUI for managing virtual machines"
+    }
+}
+# The same packages as a flat tuple of names
+_MINIMAL_QEMU_PACKAGE_NAMES: Tuple[str, ...] = tuple(
+    pkg for packages in _MINIMAL_QEMU_PACKAGES.values() for pkg in packages
+)
+
+# Names of all installed pacman packages; None until first loaded (or after an install)
+_installed_cache: Optional[FrozenSet[str]] = None
 
+
+@cached_result('is_arch_based')
 def is_arch_based() -> bool:
     """Check if the system is Arch-based."""
     if os.path.exists('/etc/arch-release'):
@@ -22,6 +43,32 @@ def is_arch_based() -> bool:
     return False
 
 
+def _installed_packages(debug: bool = False) -> FrozenSet[str]:
+    """Return the set of installed pacman packages, querying pacman once per refresh."""
+    global _installed_cache
+    if _installed_cache is None:
+        output = run_command(["pacman", "-Qq"], dry_run=False, debug=debug)
+        _installed_cache = frozenset(output.split()) if output else frozenset()
+    return _installed_cache
+
+
+def _missing_packages(packages: Sequence[str], debug: bool = False) -> List[str]:
+    """Return the packages pacman reports as not installed, via one `pacman -T` call."""
+    try:
+        result = subprocess.run(
+            ["pacman", "-T", *packages],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+    except OSError as e:
+        log_debug(f"pacman -T failed to run: {e}", debug)
+        result = None
+    # pacman -T exits 0 when everything is installed and 127 when it lists missing ones
+    if result is not None and result.returncode in (0, 127):
+        return result.stdout.split()
+    installed = _installed_packages(debug)
+    return [pkg for pkg in packages if pkg not in installed]
+
+
 def check_package_installed(package_name: str, debug: bool = False) -> bool:
     """Check if a package is installed on an Arch-based system.
     
@@ -36,11 +83,8 @@ def check_package_installed(package_name: str, debug: bool = False) -> bool:
         log_debug("Not an Arch-based system, skipping package check", debug)
         return False
 
-    # Use pacman to check if package is installed
-    cmd = f"pacman -Q {package_name} 2>/dev/null"
-    result = run_command(cmd, dry_run=False, debug=debug)
-    
-    return result is not None
+    # One `pacman -Qq` listing answers every package check
+    return package_name in _installed_packages(debug)
 
 
 def get_minimal_qemu_packages() -> Dict[str, Dict[str, str]]:
@@ -49,13 +93,7 @@ def get_minimal_qemu_packages() -> Dict[str, Dict[str, str]]:
     Returns:
         Dict: Dictionary of package groups and their packages with descriptions
     """
-    return {
-        "core": {
-            "qemu-full": "Complete QEMU installation including all optional components",
-            "libvirt": "API for managing virtualization",
-            "virt-manager": "GUI for managing virtual machines"
-        }
-    }
+    return _MINIMAL_QEMU_PACKAGES
 
 
 def install_minimal_qemu_packages(dry_run: bool = False, debug: bool = False) -> Tuple[bool, List[str], List[str]]:
@@ -68,32 +106,21 @@ def install_minimal_qemu_packages(dry_run: bool = False, debug: bool = False) ->
     Returns:
         Tuple[bool, List[str], List[str]]: (success_status, installed_packages, failed_packages)
     """
+    global _installed_cache
     if not is_arch_based():
         log_error("This function is only supported on Arch-based systems.")
         return False, [], []
     
     # Check if pacman is available
-    if not shutil.which("pacman"):
+    if not has_command("pacman"):
         log_error("pacman package manager not found. Cannot install packages.")
         return False, [], []
     
-    # Get package groups
-    package_groups = get_minimal_qemu_packages()
-    
-    # Flatten package lists
-    all_packages = []
-    for group, packages in package_groups.items():
-        all_packages.extend(packages.keys())
-    
     # Check which packages are already installed
-    installed_packages = []
-    to_install = []
-    for pkg in all_packages:
-        if check_package_installed(pkg, debug):
-            log_info(f"Package '{pkg}' is already installed.")
-            installed_packages.append(pkg)
-        else:
-            to_install.append(pkg)
+    to_install = _missing_packages(_MINIMAL_QEMU_PACKAGE_NAMES, debug)
+    installed_packages = [pkg for pkg in _MINIMAL_QEMU_PACKAGE_NAMES if pkg not in to_install]
+    for pkg in installed_packages:
+        log_info(f"Package '{pkg}' is already installed.")
     
     if not to_install:
         log_success("All required packages are already installed.")
@@ -107,34 +134,84 @@ def install_minimal_qemu_packages(dry_run: bool = False, debug: bool = False) ->
         return True, installed_packages, []
     
     # Use pacman to install the packages
-    install_cmd = f"sudo pacman -S --needed --noconfirm {' '.join(to_install)}"
-    log_info(f"Running: {install_cmd}")
-    result = run_command(install_cmd, dry_run=False, debug=debug)
+    install_cmd = ["sudo", "pacman", "-S", "--needed", "--noconfirm", *to_install]
+    log_info(f"Running: {shlex.join(install_cmd)}")
+    # Stream pacman's download/progress output instead of buffering it
+    result = run_command(install_cmd, dry_run=False, debug=debug, stream=True)
+    _installed_cache = None  # The package set has changed
     
     if result is not None:
-        newly_installed = []
-        failed_packages = []
-        
-        # Verify installation
+        # pacman -S is all-or-nothing, so success means every package went in
         for pkg in to_install:
-            if check_package_installed(pkg, debug):
-                newly_installed.append(pkg)
-                log_success(f"Successfully installed package '{pkg}'")
-            else:
-                failed_packages.append(pkg)
-                log_error(f"Failed to install package '{pkg}'")
-        
-        installed_packages.extend(newly_installed)
-        
-        if not failed_packages:
-            log_success("All required packages were installed successfully.")
-            return True, installed_packages, []
-        else:
-            log_error(f"Failed to install {len(failed_packages)} package(s): {', '.join(failed_packages)}")
-            return False, installed_packages, failed_packages
-    else:
-        log_error("Package installation failed.")
-        return False, installed_packages, to_install
+            log_success(f"Successfully installed package '{pkg}'")
+        installed_packages.extend(to_install)
+        log_success("All required packages were installed successfully.")
+        return True, installed_packages, []
+    
+    # Find out what (if anything) made it in with one more pacman query
+    failed_packages = _missing_packages(to_install, debug)
+    newly_installed = [pkg for pkg in to_install if pkg not in failed_packages]
+    installed_packages.extend(newly_installed)
+    
+    log_error("Package installation failed.")
+    if failed_packages:
+        log_error(f"Not installed: {', '.join(failed_packages)}")
+    return False, installed_packages, failed_packages
+
+
+def _current_user() -> Optional[str]:
+    """Return the invoking user (preferring SUDO_USER over root), or None if unknown."""
+    user = os.environ.get("SUDO_USER")
+    if user:
+        return user
+    try:
+        return pwd.getpwuid(os.getuid()).pw_name
+    except KeyError:
+        return None
+
+
+def _user_in_libvirt_group(user: str) -> bool:
+    """Check whether a user is in the libvirt group, as a member or by primary group."""
+    try:
+        libvirt_group = grp.getgrnam("libvirt")
+        return user in libvirt_group.gr_mem or pwd.getpwnam(user).pw_gid == libvirt_group.gr_gid
+    except KeyError:
+        return False  # Group (or user) not known yet
+
+
+def _libvirt_service_enabled() -> bool:
+    """Check whether libvirtd.service is enabled, without sudo."""
+    try:
+        result = subprocess.run(
+            ["systemctl", "is-enabled", "--quiet", "libvirtd.service"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+def _setup_stamp_path() -> str:
+    """Return the file that records the last completed QEMU setup."""
+    from .state import get_state_dir
+    return os.path.join(get_state_dir(), "qemu-setup.done")
+
+
+def _setup_fingerprint(user: Optional[str]) -> Optional[str]:
+    """Fingerprint what a completed QEMU setup depends on, or None if it can't be read.
+    
+    Installing/removing packages touches the pacman local database and any group
+    change rewrites /etc/group, so either invalidates a previous setup.
+    """
+    try:
+        pacman_mtime = os.stat("/var/lib/pacman/local").st_mtime_ns
+        group_mtime = os.stat("/etc/group").st_mtime_ns
+    except OSError:
+        return None
+    if not user:
+        return None
+    data = "\n".join([*sorted(_MINIMAL_QEMU_PACKAGE_NAMES), user, str(pacman_mtime), str(group_mtime)])
+    return hashlib.sha256(data.encode()).hexdigest()
 
 
 def enable_libvirt_service(dry_run: bool = False, debug: bool = False) -> bool:
@@ -152,34 +229,22 @@ def enable_libvirt_service(dry_run: bool = False, debug: bool = False) -> bool:
         return False
     
     # Check if systemctl is available
-    if not shutil.which("systemctl"):
+    if not has_command("systemctl"):
         log_error("systemctl not found. Cannot enable or start service.")
         return False
     
-    # Enable libvirtd service
-    enable_cmd = "sudo systemctl enable libvirtd.service"
-    log_info("Enabling libvirtd service...")
+    # Enable and start libvirtd service in one systemctl call
+    enable_cmd = ["sudo", "systemctl", "enable", "--now", "libvirtd.service"]
+    log_info("Enabling and starting libvirtd service...")
     
     if dry_run:
-        log_warning(f"[DRY RUN] Would run: {enable_cmd}")
-    else:
-        enable_result = run_command(enable_cmd, dry_run=False, debug=debug)
-        if enable_result is None:
-            log_error("Failed to enable libvirtd service.")
-            return False
-    
-    # Start libvirtd service
-    start_cmd = "sudo systemctl start libvirtd.service"
-    log_info("Starting libvirtd service...")
-    
-    if dry_run:
-        log_warning(f"[DRY RUN] Would run: {start_cmd}")
+        log_warning(f"[DRY RUN] Would run: {shlex.join(enable_cmd)}")
         return True
-    else:
-        start_result = run_command(start_cmd, dry_run=False, debug=debug)
-        if start_result is None:
-            log_error("Failed to start libvirtd service.")
-            return False
+    
+    enable_result = run_command(enable_cmd, dry_run=False, debug=debug)
+    if enable_result is None:
+        log_error("Failed to enable and start libvirtd service.")
+        return False
     
     log_success("libvirtd service enabled and started successfully.")
     return True
@@ -202,19 +267,23 @@ def configure_user_permissions(user: str = None, dry_run: bool = False, debug: b
     
     # Determine username if not provided
     if user is None:
-        user_cmd = "whoami"
-        user_result = run_command(user_cmd, dry_run=False, debug=debug)
-        if user_result is None:
+        user = _current_user()
+        if not user:
             log_error("Failed to determine current username.")
             return False
-        user = user_result.strip()
+        log_debug(f"Using current user '{user}'", debug)
+    
+    # Nothing to do if the user is already in the libvirt group
+    if _user_in_libvirt_group(user):
+        log_info(f"User '{user}' is already in the libvirt group.")
+        return True
     
     # Add user to libvirt group
-    group_cmd = f"sudo usermod -a -G libvirt {user}"
+    group_cmd = ["sudo", "usermod", "-a", "-G", "libvirt", user]
     log_info(f"Adding user '{user}' to the libvirt group...")
     
     if dry_run:
-        log_warning(f"[DRY RUN] Would run: {group_cmd}")
+        log_warning(f"[DRY RUN] Would run: {shlex.join(group_cmd)}")
         return True
     else:
         group_result = run_command(group_cmd, dry_run=False, debug=debug)
@@ -252,6 +321,28 @@ def setup_minimal_qemu_environment(user: str = None, dry_run: bool = False, debu
         log_error("This function is only supported on Arch-based systems.")
         return result_info
     
+    # Resolve the user now so the setup stamp is tied to the account actually configured
+    if user is None:
+        user = _current_user()
+    
+    # Skip everything if a previous run completed and nothing relevant changed since,
+    # as long as the service and group membership it set up are still in place
+    if not dry_run:
+        fingerprint = _setup_fingerprint(user)
+        try:
+            with open(_setup_stamp_path(), 'r') as f:
+                stamp = f.read().strip()
+        except OSError:
+            stamp = None
+        if fingerprint and stamp == fingerprint:
+            if _libvirt_service_enabled() and _user_in_libvirt_group(user):
+                log_success("QEMU environment already set up by a previous run; nothing to do.")
+                # The fingerprint covers the pacman database, so the packages are still installed
+                result_info.update(status=True, installed_packages=list(_MINIMAL_QEMU_PACKAGE_NAMES),
+                                   services_enabled=True, user_configured=True)
+                return result_info
+            log_info("QEMU environment was set up before but has changed since; setting it up again.")
+    
     # Install packages
     install_status, installed_pkgs, failed_pkgs = install_minimal_qemu_packages(dry_run, debug)
     result_info["installed_packages"] = installed_pkgs
@@ -298,6 +389,14 @@ def setup_minimal_qemu_environment(user: str = None, dry_run: bool = False, debu
     
     if result_info["status"]:
         log_success("QEMU environment set up successfully.")
+        # Remember a fully completed setup so reruns can skip it
+        fingerprint = _setup_fingerprint(user) if not dry_run and service_status and user_status else None
+        if fingerprint:
+            try:
+                with open(_setup_stamp_path(), 'w') as f:
+                    f.write(fingerprint + "\n")
+            except OSError as e:
+                log_debug(f"Could not record QEMU setup stamp: {e}", debug)
     else:
         log_warning("QEMU environment setup completed with some issues. See above for details.")
     
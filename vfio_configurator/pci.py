@@ -106,7 +106,7 @@ def get_pci_devices_mm(debug: bool = False) -> Optional[Dict[str, Dict[str, str]
                 devices[current_bdf]['driver'] = driver
                 
     log_success(f"Found {len(devices)} PCI devices.")
-    log_debug(f"Example device data: {next(iter(devices.values())) if devices else None}", debug)
+    log_debug(lambda: f"Example device data: {next(iter(devices.values())) if devices else None}", debug)
     return devices
 
 
@@ -351,32 +351,23 @@ def get_iommu_groups(debug: bool = False) -> Optional[Dict[int, List[Dict[str, s
                     
                 # Otherwise try to get minimal info directly from sysfs
                 else:
-                    try:
-                        # Read device class from sysfs
-                        class_path = device_link / "class"
-                        if class_path.exists():
-                            device_class = class_path.read_text().strip()
-                            # Convert class code (e.g., 0x030000) to human-readable
-                            if device_class.startswith("0x03"):
-                                device_info['class'] = "Display Controller"
-                            elif device_class.startswith("0x04"):
-                                device_info['class'] = "Multimedia Controller"
-                            else:
-                                device_info['class'] = f"PCI Device (Class: {device_class})"
-                                
-                        # Read vendor and device IDs
-                        vendor_path = device_link / "vendor"
-                        device_id_path = device_link / "device"
-                        
-                        if vendor_path.exists() and device_id_path.exists():
-                            vendor_id = vendor_path.read_text().strip()[2:]  # Remove "0x"
-                            device_id = device_id_path.read_text().strip()[2:]  # Remove "0x"
-                            device_info['vendor_id'] = vendor_id
-                            device_info['device_id'] = device_id
-                            
-                    except (OSError, PermissionError) as e:
-                        if debug:
-                            log_debug(f"Error reading sysfs for {bdf}: {e}", debug)
+                    # Read device class from sysfs
+                    device_class = _read_sysfs_attr(device_link, "class", debug)
+                    if device_class:
+                        # Convert class code (e.g., 0x030000) to human-readable
+                        if device_class.startswith("0x03"):
+                            device_info['class'] = "Display Controller"
+                        elif device_class.startswith("0x04"):
+                            device_info['class'] = "Multimedia Controller"
+                        else:
+                            device_info['class'] = f"PCI Device (Class: {device_class})"
+
+                    # Read vendor and device IDs
+                    vendor_id = _read_sysfs_attr(device_link, "vendor", debug)
+                    device_id = _read_sysfs_attr(device_link, "device", debug)
+                    if vendor_id and device_id:
+                        device_info['vendor_id'] = vendor_id[2:]  # Remove "0x"
+                        device_info['device_id'] = device_id[2:]  # Remove "0x"
                 
                 devices_in_group.append(device_info)
                 
@@ -408,6 +399,20 @@ def get_iommu_groups(debug: bool = False) -> Optional[Dict[int, List[Dict[str, s
     return iommu_map
 
 
+def _read_sysfs_attr(device_path: Path, attr: str, debug: bool = False) -> Optional[str]:
+    """Read one sysfs attribute of a PCI device, or None if it can't be read.
+
+    Reading directly instead of checking exists() first saves a stat per
+    attribute on every device in every IOMMU group.
+    """
+    try:
+        return (device_path / attr).read_text().strip()
+    except OSError as e:
+        if debug:
+            log_debug(f"Error reading sysfs {attr} for {device_path.name}: {e}", debug)
+        return None
+
+
 def find_gpu_related_devices(gpu: Dict[str, str], iommu_groups: Dict[int, List[Dict[str, str]]], debug: bool = False) -> Tuple[Optional[int], List[Tuple[Dict[str, str], int]]]:
     """
     Finds the IOMMU group for the main GPU and ALL related devices (sharing the same base BDF)
@@ -35,6 +35,12 @@ def display_system_summary(system_info: Dict[str, Any]) -> None:
         else:
             print(f"  {Colors.BLUE}i{Colors.ENDC} {label}: {info_msg}")
 
+    # gather_system_info skips the host checks when there is no GPU to pass through
+    passthrough_gpu = system_info.get("gpu_for_passthrough")
+
+    def print_not_run(label: str):
+        print(f"  {Colors.BLUE}i{Colors.ENDC} {label}: Not run (no GPU for passthrough)")
+
     # Root privileges
     print_status(
         "Root privileges", 
@@ -44,12 +50,15 @@ def display_system_summary(system_info: Dict[str, Any]) -> None:
     )
     
     # CPU Virtualization
-    print_status(
-        "CPU Virtualization (SVM/VT-x)", 
-        system_info["cpu_virtualization"], 
-        ok_msg="Enabled", 
-        err_msg="Not enabled in /proc/cpuinfo (check BIOS/output)"
-    )
+    if passthrough_gpu:
+        print_status(
+            "CPU Virtualization (SVM/VT-x)", 
+            system_info["cpu_virtualization"], 
+            ok_msg="Enabled", 
+            err_msg="Not enabled in /proc/cpuinfo (check BIOS/output)"
+        )
+    else:
+        print_not_run("CPU Virtualization (SVM/VT-x)")
     
     # IOMMU Enabled
     print_status(
@@ -69,22 +78,24 @@ def display_system_summary(system_info: Dict[str, Any]) -> None:
         err_msg="Not found (recommended, will attempt to configure)"
     )
 
-    # Secure Boot Status
-    sb_status = system_info.get('secure_boot_enabled')
-    import shutil
-    sb_msg = "Disabled" if sb_status is False else ("ENABLED (Potential issue for module loading)" if sb_status is True else "Could not determine")
-    sb_label = f"Secure Boot Status ({'mokutil' if shutil.which('mokutil') else 'EFI Var'})"
-    print_status(
-        sb_label, 
-        sb_status is False, 
-        ok_msg=sb_msg, 
-        warn_msg=sb_msg, 
-        err_msg=sb_msg
-    )
+    # Secure Boot Status (a host check, only run once a passthrough GPU is found)
+    if passthrough_gpu:
+        sb_status = system_info.get('secure_boot_enabled')
+        import shutil
+        sb_msg = "Disabled" if sb_status is False else ("ENABLED (Potential issue for module loading)" if sb_status is True else "Could not determine")
+        sb_label = f"Secure Boot Status ({'mokutil' if shutil.which('mokutil') else 'EFI Var'})"
+        print_status(
+            sb_label, 
+            sb_status is False, 
+            ok_msg=sb_msg, 
+            warn_msg=sb_msg, 
+            err_msg=sb_msg
+        )
+    else:
+        print_not_run("Secure Boot Status")
 
     # --- GPU Information ---
     print(f"\n{Colors.BOLD}GPU Setup:{Colors.ENDC}")
-    passthrough_gpu = system_info.get("gpu_for_passthrough")
     if passthrough_gpu:
         gpu_desc = passthrough_gpu.get('description', 'Unknown GPU')
         gpu_bdf = passthrough_gpu.get('bdf', '??:??.?')
@@ -156,33 +167,36 @@ def display_system_summary(system_info: Dict[str, Any]) -> None:
 
     # --- Other Checks ---
     print(f"\n{Colors.BOLD}System Configuration:{Colors.ENDC}")
-    print_status(
-        "VFIO Modules Loaded", 
-        system_info["vfio_modules_loaded"], 
-        ok_msg="Modules (vfio, vfio_pci, etc.) are currently loaded", 
-        warn_msg="Not all modules loaded (Expected before reboot/config)"
-    )
-    
-    print_status(
-        "Kernel Cmdline vfio-pci.ids", 
-        not system_info["kernel_cmdline_conflicts"], 
-        ok_msg="No conflicting 'vfio-pci.ids' found", 
-        err_msg="Found 'vfio-pci.ids' (Potential conflict with modprobe)"
-    )
-    
-    print_status(
-        "BTRFS Root Filesystem", 
-        system_info["btrfs_system"], 
-        ok_msg="Detected (Snapshot recommended)", 
-        info_msg="Not detected"
-    )
-    
-    print_status(
-        "Virtualization Host Software", 
-        system_info["libvirt_installed"], 
-        ok_msg="Tools like virsh/qemu/libvirtd found", 
-        warn_msg="Some tools seem missing (Installation recommended)"
-    )
+    if passthrough_gpu:
+        print_status(
+            "VFIO Modules Loaded", 
+            system_info["vfio_modules_loaded"], 
+            ok_msg="Modules (vfio, vfio_pci, etc.) are currently loaded", 
+            warn_msg="Not all modules loaded (Expected before reboot/config)"
+        )
+
+        print_status(
+            "Kernel Cmdline vfio-pci.ids", 
+            not system_info["kernel_cmdline_conflicts"], 
+            ok_msg="No conflicting 'vfio-pci.ids' found", 
+            err_msg="Found 'vfio-pci.ids' (Potential conflict with modprobe)"
+        )
+
+        print_status(
+            "BTRFS Root Filesystem", 
+            system_info["btrfs_system"], 
+            ok_msg="Detected (Snapshot recommended)", 
+            info_msg="Not detected"
+        )
+
+        print_status(
+            "Virtualization Host Software", 
+            system_info["libvirt_installed"], 
+            ok_msg="Tools like virsh/qemu/libvirtd found", 
+            warn_msg="Some tools seem missing (Installation recommended)"
+        )
+    else:
+        print_not_run("Host checks")
 
     # --- Proposed Actions ---
     print(f"\n{Colors.BOLD}Configuration Actions Needed:{Colors.ENDC}")
@@ -212,7 +226,7 @@ def display_system_summary(system_info: Dict[str, Any]) -> None:
     else:
         print(f"  {Colors.GREEN}✓{Colors.ENDC} Initramfs update likely not needed based on current checks.")
 
-    if not system_info["libvirt_installed"]:
+    if passthrough_gpu and not system_info["libvirt_installed"]:
         print(f"  {Colors.YELLOW}→{Colors.ENDC} Install virtualization software (QEMU, Libvirt) - Recommended.")
 
     if system_info["btrfs_system"]:
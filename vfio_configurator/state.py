@@ -3,6 +3,7 @@
 import os
 import json
 import datetime
+from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Set, Tuple
 
@@ -271,28 +272,42 @@ def track_change(
     Returns:
         Updated changes dictionary
     """
-    if details is None:
-        details = {}
-        
-    # Initialize category if it doesn't exist
-    if category not in changes:
-        changes[category] = []
+    # Add to the list of changes in this category
+    changes.setdefault(category, []).append(_make_change_entry(target, action, details))
+    
+    return changes
+
 
-    # Create change entry
+def _make_change_entry(target: str, action: str, details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build a single timestamped change record."""
     change_entry = {
         "target": target,
         "action": action,
         "timestamp": datetime.datetime.now().isoformat()
     }
-    
     # Add any additional details
     if details:
         change_entry.update(details)
-        
-    # Add to the list of changes in this category
-    changes[category].append(change_entry)
-    
-    return changes
+    return change_entry
+
+
+class ChangeTracker:
+    """Accumulates change records by category for one setup run.
+
+    Same records as track_change(), but appended in place so callers don't
+    have to thread and reassign a changes dict through every step.
+    """
+
+    def __init__(self):
+        self._changes: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    def add(self, category: str, target: str, action: str, details: Optional[Dict[str, Any]] = None) -> None:
+        """Record a change (see track_change() for the arguments)."""
+        self._changes[category].append(_make_change_entry(target, action, details))
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return the tracked changes as a plain dict."""
+        return dict(self._changes)
 
 
 def create_cleanup_script(output_dir: str, changes: Dict[str, List[Dict[str, Any]]], dry_run: bool = False, debug: bool = False) -> Optional[str]:
@@ -2,12 +2,13 @@
 
 import os
 import re
+import shlex
 import shutil
 import functools
 import subprocess
 import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, FrozenSet, Optional, Callable, Sequence, Union
 
 # Cache for frequently accessed system information
 _SYSTEM_CACHE: Dict[str, Any] = {}
@@ -43,9 +44,15 @@ def log_error(message: str) -> None:
     print(f"{Colors.RED}{Colors.BOLD}[ERROR]{Colors.ENDC} {message}")
 
 
-def log_debug(message: str, debug: bool = False) -> None:
-    """Print a debug message if debug mode is enabled."""
+def log_debug(message: Union[str, Callable[[], str]], debug: bool = False) -> None:
+    """Print a debug message if debug mode is enabled.
+
+    The message may be a zero-argument callable, which is only invoked when
+    debug is enabled, for messages that are expensive to build.
+    """
     if debug:
+        if callable(message):
+            message = message()
         print(f"{Colors.BLUE}[DEBUG]{Colors.ENDC} {message}")
 
 
@@ -76,37 +83,48 @@ def cached_result(key: str):
     return decorator
 
 
-def run_command(command: str, dry_run: bool = False, debug: bool = False) -> Optional[str]:
-    """Run a shell command and return its output.
+def run_command(command: Union[str, Sequence[str]], dry_run: bool = False, debug: bool = False,
+                stream: bool = False) -> Optional[str]:
+    """Run a command and return its output.
     
     Args:
-        command: The command to run
+        command: The command to run. A string is run through the shell; an
+            argument list is executed directly without one.
         dry_run: If True, don't actually execute commands that modify the system
         debug: If True, print additional debug information
+        stream: If True, let the command write straight to the terminal instead
+            of capturing its output (for long, chatty commands)
         
     Returns:
-        Command output as string or None if command failed
+        Command output as string (empty when streamed) or None if command failed
     """
+    use_shell = isinstance(command, str)
+    if not use_shell:
+        command = list(command)
+    # Printable form, also used for the read-only/kernelstub checks below
+    command_str = command if use_shell else shlex.join(command)
+
     if dry_run:
-        log_debug(f"[DRY RUN] Would run command: {command}", debug)
+        log_debug(f"[DRY RUN] Would run command: {command_str}", debug)
         # For certain read-only commands, we can still execute them in dry run mode
         read_only_prefixes = ('grep ', 'lspci ', 'ls ', 'df ', 'cat ', 'find ', 'test ', '[ ', 'uname ',
                              'mokutil ', 'findmnt ', 'cmp ', 'dmesg ', 'id ')
         is_read_only = False
         for prefix in read_only_prefixes:
-            if command.startswith(prefix):
+            if command_str.startswith(prefix):
                 is_read_only = True
                 break
         # Special case: kernelstub -p is read-only
-        if 'kernelstub -p' in command:
+        if 'kernelstub -p' in command_str:
             is_read_only = True
 
         if is_read_only:
             try:
                 result = subprocess.run(
                     command,
-                    shell=True,
+                    shell=use_shell,
                     check=True,
+                    stdin=subprocess.DEVNULL,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
@@ -118,21 +136,22 @@ def run_command(command: str, dry_run: bool = False, debug: bool = False) -> Opt
                 log_debug(f"[DRY RUN] Command (simulated read) would have failed: {e.stderr.strip()}", debug)
                 return None
             except FileNotFoundError:
-                log_debug(f"[DRY RUN] Command (simulated read) not found: {command.split()[0]}", debug)
+                log_debug(f"[DRY RUN] Command (simulated read) not found: {command_str.split()[0]}", debug)
                 return None
         else:
             # Simulate success for commands that would modify the system
             return "DRY-RUN-SUCCESS"
 
     # Special handling for kernelstub
-    if 'kernelstub' in command:
-        log_debug(f"Running kernelstub command: {command}", debug)
+    if 'kernelstub' in command_str:
+        log_debug(f"Running kernelstub command: {command_str}", debug)
         # Ensure sudo is present if needed
         try:
             result = subprocess.run(
                 command,
-                shell=True,
+                shell=use_shell,
                 check=True,
+                stdin=subprocess.DEVNULL,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -141,23 +160,39 @@ def run_command(command: str, dry_run: bool = False, debug: bool = False) -> Opt
             log_debug(f"Kernelstub command output: {result.stdout.strip()}", debug)
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
-            log_error(f"Kernelstub command failed: {command}")
+            log_error(f"Kernelstub command failed: {command_str}")
             log_error(f"Stderr: {e.stderr.strip()}")
             log_debug(f"Stdout: {e.stdout.strip()}", debug)
             return None
         except FileNotFoundError:
-            log_error(f"Kernelstub command not found: {command.split()[0]}")
+            log_error(f"Kernelstub command not found: {command_str.split()[0]}")
             return None
         except Exception as e:
-            log_error(f"Unexpected error running kernelstub command '{command}': {e}")
+            log_error(f"Unexpected error running kernelstub command '{command_str}': {e}")
             return None
 
+    # Streamed commands inherit stdout/stderr; only the exit status is kept
+    if stream:
+        try:
+            result = subprocess.run(command, shell=use_shell, stdin=subprocess.DEVNULL)
+        except FileNotFoundError:
+            log_error(f"Command not found: {command_str.split()[0]}")
+            return None
+        except Exception as e:
+            log_error(f"Unexpected error running command '{command_str}': {e}")
+            return None
+        if result.returncode != 0:
+            log_error(f"Command failed (exit status {result.returncode}): {command_str}")
+            return None
+        return ""
+
     # Standard handling for other commands
     try:
         result = subprocess.run(
             command,
-            shell=True,
+            shell=use_shell,
             check=True,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
@@ -167,18 +202,49 @@ def run_command(command: str, dry_run: bool = False, debug: bool = False) -> Opt
             log_debug(f"Command output: {result.stdout.strip()}", debug)
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
-        log_error(f"Command failed: {command}")
+        log_error(f"Command failed: {command_str}")
         log_error(f"Stderr: {e.stderr.strip()}")
         log_debug(f"Stdout: {e.stdout.strip()}", debug)  # Show stdout on error too if debugging
         return None
     except FileNotFoundError:
-        log_error(f"Command not found: {command.split()[0]}")
+        log_error(f"Command not found: {command_str.split()[0]}")
         return None
     except Exception as e:
-        log_error(f"Unexpected error running command '{command}': {e}")
+        log_error(f"Unexpected error running command '{command_str}': {e}")
         return None
 
 
+@cached_result('path_execs')
+def _path_execs() -> FrozenSet[str]:
+    """Return the names of all executables on $PATH, scanning each directory once."""
+    names = set()
+    for directory in os.environ.get('PATH', os.defpath).split(os.pathsep):
+        if not directory:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        # Same test as shutil.which: a regular file we may execute
+                        if (entry.name not in names and entry.is_file()
+                                and os.access(entry.path, os.X_OK)):
+                            names.add(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return frozenset(names)
+
+
+def has_command(name: str) -> bool:
+    """Check whether a command is available on $PATH.
+    
+    $PATH is scanned once and the result shared by every module, so repeated
+    probes for tools cost a set lookup instead of a filesystem walk.
+    """
+    return name in _path_execs()
+
+
 def create_timestamped_backup(file_path_str: str, dry_run: bool = False, debug: bool = False, output_dir: str = None) -> Optional[str]:
     """Create a timestamped backup of a file.
     
@@ -271,8 +337,15 @@ def get_distro_info():
     
     Returns:
         dict: A dictionary containing distribution information with keys like
-              'id', 'name', 'version', etc.
+              'id', 'name', 'version', etc. Each call gets its own copy of the
+              cached result, so callers may modify it freely.
     """
+    return dict(_read_distro_info())
+
+
+@cached_result('distro_info')
+def _read_distro_info() -> Dict[str, str]:
+    """Parse /etc/os-release once (see get_distro_info)."""
     distro_info = {}
     
     try:
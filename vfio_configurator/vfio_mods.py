@@ -152,7 +152,7 @@ def configure_vfio_modprobe(device_ids: List[str], dry_run: bool = False, debug:
     
     # Add vfio_virqfd only for kernels < 6.2 for backward compatibility
     kernel_version = get_kernel_version()
-    if kernel_version and (kernel_version[0] < 6 or (kernel_version[0] == 6 and kernel_version[1] < 2)):
+    if kernel_version and kernel_version < (6, 2):
         vfio_modules_to_load.append("vfio_virqfd")
         log_debug(f"Adding vfio_virqfd module for kernel {kernel_version}", debug)
     else: